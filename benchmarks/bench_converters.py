@@ -0,0 +1,225 @@
+"""Throughput, peak memory and golden-output checks for every conversion path.
+
+Converts synthetic images (gradient, noise, checkerboard, photo-like) and ASCII text at several
+sizes through the full image pipeline (decode, resample, encode) for each encoder, the ASCII
+layout and the OWOT edit builder. Reports cells per second and the tracemalloc peak of each path.
+
+Every output is checked two ways:
+
+* against reference ports of the original per-cell code (resize_image, the image single and
+  image threading loops with choose_quadrant/average_color, the ASCII per-character loop),
+  for inputs of at most --reference-cells cells since those run in pure Python. The original
+  quadrant loop resized to an odd width or height and then cropped a pixel, where the current
+  pipeline resamples to the even size directly, so those inputs have no quadrant reference;
+* against the SHA-256 digests in golden.json, recorded from the current implementation with
+  --record, so a faster engine can be shown to produce identical cell grids.
+
+Runs offline: inputs are generated in memory and written to a temporary directory. Resampling
+goes through Pillow, so digests recorded with another Pillow version may differ.
+
+    python benchmarks/bench_converters.py [--sizes 100x60,640x480] [--repeat 3] [--record]
+"""
+import argparse, hashlib, json, os, sys, tempfile, time, tracemalloc
+
+import numpy as np
+import PIL
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core import QUADRANT_MAP, SQUARE_WIDTH, SQUARE_HEIGHT, convert_image, layout_text
+from bench_encoders import synthetic_images
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.json")
+IMAGE_PATHS = ("pixel", "quadrant", "quadrant-fit", "sextant", "sextant-fit")
+# Edits are numbered and positioned as if pasted here (in OWOT tiles)
+START_X, START_Y = 3, -2
+TEXT_COLOR, TEXT_BG_COLOR = 0x1a2b3c, 0xf70004
+
+
+# ---- Reference ports of the original per-cell converters ----
+
+def brightness(rgb):
+    r, g, b = rgb
+    return 0.299 * r + 0.587 * g + 0.114 * b
+
+def choose_quadrant(pixels):
+    avg_brightness = sum(brightness(p) for p in pixels) / 4
+    return tuple(1 if brightness(p) < avg_brightness else 0 for p in pixels)
+
+def average_color(pixels):
+    r = sum(p[0] for p in pixels) // len(pixels)
+    g = sum(p[1] for p in pixels) // len(pixels)
+    b = sum(p[2] for p in pixels) // len(pixels)
+    return (r, g, b)
+
+def resize_image(img):
+    return img.resize((int(img.width * 1.20), int(img.height * 0.70)), Image.LANCZOS)
+
+def tile_position(x, y):
+    abs_x = START_X * SQUARE_WIDTH + x
+    abs_y = START_Y * SQUARE_HEIGHT + y
+    return [abs_y // SQUARE_HEIGHT, abs_x // SQUARE_WIDTH, abs_y % SQUARE_HEIGHT, abs_x % SQUARE_WIDTH]
+
+def reference_pixel_edits(img):
+    img = resize_image(img.convert("RGB"))
+    pixels = img.load()
+    edits = []
+    for y in range(img.height):
+        for x in range(img.width):
+            r, g, b = pixels[x, y]
+            edits.append(tile_position(x, y) + [0, " ", len(edits), 0, (r << 16) | (g << 8) | b])
+    return edits
+
+# None where the original resize produced an odd size (see the module docstring)
+def reference_quadrant_edits(img):
+    img = resize_image(img.convert("RGB"))
+    if img.width % 2 or img.height % 2:
+        return None
+    img = img.crop((0, 0, img.width // 2 * 2, img.height // 2 * 2))
+    pixels = img.load()
+    edits = []
+    for y in range(0, img.height, 2):
+        for x in range(0, img.width, 2):
+            block = [pixels[x, y], pixels[x + 1, y], pixels[x, y + 1], pixels[x + 1, y + 1]]
+            quadrant = choose_quadrant(block)
+            dark_pixels = [block[i] for i in range(4) if quadrant[i] == 1] or block
+            light_pixels = [block[i] for i in range(4) if quadrant[i] == 0] or block
+            fg, bg = average_color(dark_pixels), average_color(light_pixels)
+            edits.append(tile_position(x // 2, y // 2) + [0, QUADRANT_MAP.get(quadrant, '█'), len(edits),
+                         (fg[0] << 16) | (fg[1] << 8) | fg[2], (bg[0] << 16) | (bg[1] << 8) | bg[2]])
+    return edits
+
+def reference_ascii_edits(text):
+    edits = []
+    for row_index, line in enumerate(text.split("\n")):
+        for col_index, char in enumerate(line):
+            edits.append(tile_position(col_index, row_index) + [0, char, len(edits), TEXT_COLOR, TEXT_BG_COLOR])
+    return edits
+
+REFERENCES = {"pixel": reference_pixel_edits, "quadrant": reference_quadrant_edits}
+
+
+# ---- Inputs ----
+
+def synthetic_text(cols, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    alphabet = np.array(list(" .:-=+*#%@/\\|()[]<>_~'`^,;!?" "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"))
+    widths = rng.integers(cols // 2, cols + 1, rows)
+    return "\n".join("".join(alphabet[rng.integers(0, len(alphabet), w)]) for w in widths)
+
+def parse_sizes(text):
+    return [tuple(int(v) for v in size.lower().split("x")) for size in text.split(",")]
+
+
+# ---- Measurement ----
+
+def grid_digest(grid):
+    digest = hashlib.sha256()
+    digest.update(np.array([grid.rows, grid.cols], dtype="<u4").tobytes())
+    for array in (grid.codepoints, grid.fg, grid.bg):
+        digest.update(np.ascontiguousarray(array, dtype="<u4").tobytes())
+    if grid.mask is not None:
+        digest.update(np.ascontiguousarray(grid.mask, dtype=bool).tobytes())
+    if grid.clusters:
+        digest.update("\0".join(grid.clusters).encode("utf-8"))
+    return digest.hexdigest()
+
+# Best wall time of repeat runs, then one more run under tracemalloc for the peak
+def measure(convert, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = convert()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    convert()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+def edits_without_timestamps(grid):
+    edits = grid.offset(START_X * SQUARE_WIDTH, START_Y * SQUARE_HEIGHT).to_edits()
+    for edit in edits:
+        edit[4] = 0
+    return edits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100x60,640x480,1600x1200", help="image sizes as WIDTHxHEIGHT,...")
+    parser.add_argument("--text-sizes", default="80x25,400x200,2000x1000", help="ASCII sizes as COLSxROWS,...")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per path (best is reported)")
+    parser.add_argument("--reference-cells", type=int, default=200000, help="largest input checked against the reference ports")
+    parser.add_argument("--record", action="store_true", help=f"write the current outputs' digests to {os.path.basename(GOLDEN_FILE)}")
+    options = parser.parse_args()
+
+    golden = {}
+    if os.path.exists(GOLDEN_FILE) and not options.record:
+        with open(GOLDEN_FILE) as f:
+            golden = json.load(f)
+        if golden.get("pillow") != PIL.__version__:
+            print(f"[!] {os.path.basename(GOLDEN_FILE)} was recorded with Pillow {golden.get('pillow')}, this is {PIL.__version__}")
+    recorded = {}
+    failures = []
+
+    def check(name, grid, reference=None):
+        digest = recorded[name] = grid_digest(grid)
+        status = []
+        expected_edits = reference() if reference is not None else None
+        if expected_edits is not None:
+            status.append("ref ok" if edits_without_timestamps(grid) == expected_edits else "REF MISMATCH")
+        expected = golden.get("digests", {}).get(name)
+        if expected is not None:
+            status.append("golden ok" if expected == digest else "GOLDEN MISMATCH")
+        if any("MISMATCH" in s for s in status):
+            failures.append(name)
+        return ", ".join(status) or "-"
+
+    def report(name, cells, seconds, peak, status):
+        print(f"{name:<40}{cells:>10,}{cells / seconds:>14,.0f}{seconds * 1000:>10.1f}{peak / 2 ** 20:>10.1f}  {status}")
+
+    print(f"{'path':<40}{'cells':>10}{'cells/s':>14}{'ms':>10}{'peak MB':>10}  checks")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height in parse_sizes(options.sizes):
+            for image, rgb in synthetic_images(width, height).items():
+                path = os.path.join(tmp, f"{image}-{width}x{height}.png")
+                Image.fromarray(rgb).save(path)
+                grids = {}
+                for encoder in IMAGE_PATHS:
+                    grid, seconds, peak = measure(lambda: convert_image(path, encoder, workers=1), options.repeat)
+                    grids[encoder] = grid
+                    reference = None
+                    if encoder in REFERENCES and grid.rows * grid.cols <= options.reference_cells:
+                        def reference():
+                            with Image.open(path) as img:
+                                return REFERENCES[encoder](img)
+                    name = f"image/{image}/{width}x{height}/{encoder}"
+                    report(name, grid.rows * grid.cols, seconds, peak, check(name, grid, reference))
+                # The edit builder on the image threading mode's default grid
+                edits, seconds, peak = measure(lambda: sum(len(chunk) for chunk in grids["quadrant"].iter_edits(500)), options.repeat)
+                report(f"edits/{image}/{width}x{height}/quadrant", edits, seconds, peak, "-")
+
+        for cols, rows in parse_sizes(options.text_sizes):
+            text = synthetic_text(cols, rows)
+            grid, seconds, peak = measure(lambda: layout_text(text, TEXT_COLOR, TEXT_BG_COLOR), options.repeat)
+            reference = None
+            if len(grid) <= options.reference_cells:
+                reference = lambda: reference_ascii_edits(text)
+            name = f"ascii/{cols}x{rows}"
+            report(name, len(grid), seconds, peak, check(name, grid, reference))
+            edits, seconds, peak = measure(lambda: sum(len(chunk) for chunk in grid.iter_edits(500)), options.repeat)
+            report(f"edits/ascii/{cols}x{rows}", edits, seconds, peak, "-")
+
+    if options.record:
+        golden = {"pillow": PIL.__version__, "numpy": np.__version__, "digests": recorded}
+        with open(GOLDEN_FILE, 'w') as f:
+            json.dump(golden, f, indent=1, sort_keys=True)
+        print(f"[!] Recorded {len(recorded)} digests to {GOLDEN_FILE}")
+    if failures:
+        print(f"[X] {len(failures)} outputs differ: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
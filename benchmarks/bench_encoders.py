@@ -0,0 +1,109 @@
+"""Compare the threshold and best-fit block encoders on synthetic images.
+
+For quadrant and sextant glyphs, reports the encode throughput and the mean squared RGB error
+per pixel between the source and its two-color-per-cell reconstruction.
+
+A second table compares color processing ahead of the quadrant encoder: linear-light averaging,
+plain quantization to --levels per channel, and ordered and Floyd-Steinberg dithering to the same
+levels. Besides the per-pixel error it reports the RMS error of cell and 4x4-cell averages in
+linear light, which is what the eye sees from a distance (and where banding shows up).
+
+    python benchmarks/bench_encoders.py [--size 1200x800] [--repeat 3] [--levels 8]
+"""
+import argparse, os, sys, time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core import GLYPH_SETS, DITHER_METHODS, SRGB_TO_LINEAR, encode_blocks, split_blocks, dither_palette
+
+
+def synthetic_images(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float64)
+    images = {}
+    images["gradient"] = np.stack([x / width * 255, y / height * 255, (1 - x / width) * 255], axis=-1)
+    images["noise"] = rng.integers(0, 256, (height, width, 3))
+    images["checkerboard"] = np.where(((x // 3 + y // 3) % 2)[..., None] == 0, [230, 40, 40], [20, 20, 90])
+    # Smooth color fields with hard-edged shapes, roughly photo-like
+    photo = 128 + 60 * np.stack([np.sin(x / 37 + k) * np.cos(y / 23 - k) for k in range(3)], axis=-1)
+    circle = ((x - width / 2) ** 2 + (y - height / 2) ** 2) < (min(width, height) / 3) ** 2
+    photo[circle] = photo[circle] * 0.4 + [150, 120, 30]
+    images["photo"] = photo + rng.normal(0, 6, photo.shape)
+    return {name: np.clip(img, 0, 255).astype(np.uint8) for name, img in images.items()}
+
+
+# The glyph/fg/bg reconstruction as (rows, cols, block_w * block_h, 3) blocks
+def reconstruct(glyphs, codepoints, fg, bg):
+    block_w, block_h, patterns, glyph_codepoints = GLYPH_SETS[glyphs]
+    order = np.argsort(glyph_codepoints)
+    pattern = order[np.searchsorted(glyph_codepoints[order], codepoints)]
+    unpack = lambda c: np.stack([(c >> 16) & 255, (c >> 8) & 255, c & 255], axis=-1).astype(np.int32)
+    on = patterns[pattern][..., None]
+    return np.where(on, unpack(fg)[..., None, :], unpack(bg)[..., None, :])
+
+# Mean squared RGB error per pixel of the glyph/fg/bg reconstruction
+def reconstruction_error(rgb, glyphs, codepoints, fg, bg):
+    block_w, block_h = GLYPH_SETS[glyphs][:2]
+    block = split_blocks(rgb, block_w, block_h)
+    return float(((reconstruct(glyphs, codepoints, fg, bg) - block) ** 2).sum(axis=-1).mean())
+
+# RMS difference (in 8-bit units) of the linear-light averages over cells x cells groups of quadrant cells
+def average_error(rgb, codepoints, fg, bg, cells=1):
+    source = SRGB_TO_LINEAR[split_blocks(rgb, 2, 2)].mean(axis=2)
+    recon = SRGB_TO_LINEAR[reconstruct("quadrant", codepoints, fg, bg)].mean(axis=2)
+    rows, cols = source.shape[0] // cells * cells, source.shape[1] // cells * cells
+    group = lambda a: a[:rows, :cols].reshape(rows // cells, cells, cols // cells, cells, 3).mean(axis=(1, 3))
+    return float(np.sqrt(((group(recon) - group(source)) ** 2).mean()) * 255)
+
+# Color processing variants: name -> (preprocess rgb, average in linear light)
+def color_variants(levels):
+    codes, linear = dither_palette(levels)
+    midpoints = (linear[1:] + linear[:-1]) / 2
+    return {
+        "plain": (None, False),
+        "linear": (None, True),
+        f"quantize-{levels}": (lambda rgb: codes[np.searchsorted(midpoints, SRGB_TO_LINEAR[rgb])], True),
+        **{f"{method}-{levels}": (lambda rgb, dither=dither: dither(rgb, levels), True) for method, dither in DITHER_METHODS.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="1200x800", help="image size as WIDTHxHEIGHT")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per encoder (best is reported)")
+    parser.add_argument("--levels", type=int, default=8, help="levels per channel for quantization and dithering")
+    options = parser.parse_args()
+    width, height = (int(v) for v in options.size.lower().split("x"))
+
+    images = synthetic_images(width, height)
+    print(f"{'image':<13}{'glyphs':<10}{'method':<11}{'cells/s':>12}{'ms':>9}{'mean error':>12}")
+    for name, rgb in images.items():
+        for glyphs in GLYPH_SETS:
+            for method in ("threshold", "bestfit"):
+                best = float("inf")
+                for _ in range(options.repeat):
+                    start = time.perf_counter()
+                    codepoints, fg, bg = encode_blocks(rgb, glyphs, method)
+                    best = min(best, time.perf_counter() - start)
+                error = reconstruction_error(rgb, glyphs, codepoints, fg, bg)
+                print(f"{name:<13}{glyphs:<10}{method:<11}{codepoints.size / best:>12,.0f}{best * 1000:>9.1f}{error:>12.1f}")
+
+    print()
+    print(f"{'image':<13}{'colors':<22}{'ms':>9}{'mean error':>12}{'cell rms':>10}{'4x4 rms':>10}")
+    for name, rgb in images.items():
+        for variant, (preprocess, linear) in color_variants(options.levels).items():
+            best = float("inf")
+            for _ in range(options.repeat):
+                start = time.perf_counter()
+                pixels = preprocess(rgb) if preprocess else rgb
+                codepoints, fg, bg = encode_blocks(pixels, "quadrant", "threshold", linear)
+                best = min(best, time.perf_counter() - start)
+            # Errors against the original pixels, not the dithered ones
+            error = reconstruction_error(rgb, "quadrant", codepoints, fg, bg)
+            cell, group = (average_error(rgb, codepoints, fg, bg, cells) for cells in (1, 4))
+            print(f"{name:<13}{variant:<22}{best * 1000:>9.1f}{error:>12.1f}{cell:>10.2f}{group:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
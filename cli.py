@@ -0,0 +1,140 @@
+# Command line converter: image or ASCII file -> .ddraw cell-grid file, ANSI, HTML or preview PNG, without loading Qt
+import sys, os, time, json, argparse, multiprocessing
+from core import (IMAGE_ENCODERS, DITHER_METHODS, DITHER_LEVELS, ALPHA_THRESHOLD, PREVIEW_CELL_WIDTH, PREVIEW_CELL_HEIGHT,
+                  EXPORT_EXTENSIONS, StageTimer, build_grid, convert_text, export_grid, parse_color, write_profile)
+
+# Inputs with these extensions are read as ASCII art unless --image is given
+ASCII_EXTENSIONS = (".txt", ".asc", ".nfo")
+
+def convert_command(args):
+    is_ascii = args.ascii or (not args.image and args.input.lower().endswith(ASCII_EXTENSIONS))
+    args.mode = "ascii_single" if is_ascii else "image_threading"
+    args.ascii_file = args.image_file = args.input
+    try:
+        parse_color(args.color)
+        parse_color(args.bg_color)
+    except ValueError as e:
+        print(f"[X] Invalid color: {e}")
+        return 1
+
+    start = time.perf_counter()
+    args.timer = StageTimer(args.profile or os.environ.get("DREAMDRAWER_PROFILE"), args.profile_dir)
+    grid = build_grid(args)
+    status = write_output(grid, args, start) if grid is not None else 1
+    # After the export, which is a profiled stage too
+    write_profile(args.timer)
+    return status
+
+def text_command(args):
+    start = time.perf_counter()
+    try:
+        color, bg_color = parse_color(args.color, 0), parse_color(args.bg_color)
+    except ValueError as e:
+        print(f"[X] Invalid color: {e}")
+        return 1
+    text = args.text
+    if args.text_file:
+        try:
+            with open(args.text_file, 'r', encoding='utf-8-sig') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"[X] Error reading {args.text_file}: {e}")
+            return 1
+    if not text.strip():
+        print("[X] No text to render")
+        return 1
+    args.timer = StageTimer()
+    try:
+        with args.timer.activate():
+            grid = convert_text(text, args.font, args.size, args.encoder, color, bg_color, args.alpha_threshold,
+                                workers=args.workers, dither=args.dither, dither_levels=args.dither_levels, linear=args.linear)
+    except OSError as e:
+        print(f"[X] Error loading font {args.font or '(built-in)'}: {e}")
+        return 1
+    except ValueError as e:
+        print(f"[X] Error converting text: {e}")
+        return 1
+    print(f"[TIME] {args.timer.summary()}")
+    return write_output(grid, args, start)
+
+# Write a .ddraw file, or export ANSI, HTML or a rendered preview PNG by the output's extension.
+# Returns the command's exit status.
+def write_output(grid, args, start):
+    if args.wipe:
+        grid = grid.wiped()
+    try:
+        with args.timer.activate():
+            if args.output.lower().endswith(EXPORT_EXTENSIONS):
+                export_grid(grid, args.output, args.cell_width, args.cell_height)
+            else:
+                grid.save(args.output)
+    except (ValueError, OSError) as e:
+        print(f"[X] Error writing {args.output}: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"[!] {grid.cols}x{grid.rows} cells, {len(grid)} edits -> {args.output} ({elapsed:.2f}s)")
+    if args.timings:
+        print(json.dumps(args.timer.report(), indent=2))
+    return 0
+
+# Options shared by the commands that encode images
+def add_image_arguments(command):
+    command.add_argument("--encoder", choices=sorted(IMAGE_ENCODERS), default="quadrant", help="image encoder (default: quadrant)")
+    command.add_argument("--alpha-threshold", type=int, default=ALPHA_THRESHOLD,
+                         help=f"leave out image cells whose most opaque pixel has a lower alpha, 0-255 (default: {ALPHA_THRESHOLD})")
+    command.add_argument("--dither", choices=sorted(DITHER_METHODS), default=None, help="posterize image colors to --dither-levels per channel with this dither pattern (an effect; less accurate than plain encoding)")
+    command.add_argument("--dither-levels", type=int, default=DITHER_LEVELS, choices=range(2, 257), metavar="2-256",
+                         help=f"levels per color channel when dithering (default: {DITHER_LEVELS})")
+    command.add_argument("--linear", action="store_true", help="resample and average image colors in linear light")
+    command.add_argument("--workers", type=int, default=None, help="encoder processes, 0 for one per core (default: 1, no process pool)")
+
+# Options shared by every command that writes a grid
+def add_output_arguments(command):
+    command.add_argument("-o", "--output", required=True,
+                         help="output file; .ans writes ANSI truecolor text, .html a web page, .png a rendered preview, anything else a .ddraw cell-grid file")
+    command.add_argument("--wipe", action="store_true", help="convert to wipe edits (blank cells of the same shape)")
+    command.add_argument("--timings", action="store_true", help="print per-stage timings as JSON")
+    command.add_argument("--cell-width", type=int, default=PREVIEW_CELL_WIDTH, help="preview cell width in pixels")
+    command.add_argument("--cell-height", type=int, default=PREVIEW_CELL_HEIGHT, help="preview cell height in pixels")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Convert images and ASCII art to OWOT cell grids")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="convert an image, ASCII or .ddraw file to a .ddraw file, ANSI, HTML or preview PNG")
+    convert.add_argument("input", help="image, ASCII text or .ddraw file")
+    add_output_arguments(convert)
+    kind = convert.add_mutually_exclusive_group()
+    kind.add_argument("--ascii", action="store_true", help="read the input as ASCII art")
+    kind.add_argument("--image", action="store_true", help="read the input as an image")
+    add_image_arguments(convert)
+    convert.add_argument("--color", default="", help="ASCII text color, e.g. #000000")
+    convert.add_argument("--bg-color", default="", help="ASCII background color, e.g. #f70004")
+    convert.add_argument("--markup", action="store_true",
+                         help="ASCII color tags: {#rrggbb} text, {#rrggbb/#rrggbb} text and background, {/#rrggbb} background, {/} reset, {{ literal {")
+    convert.add_argument("--strip-rows", type=int, default=None, help="cell rows converted at a time")
+    convert.add_argument("--cache-dir", default=None, help="conversion cache directory")
+    convert.add_argument("--profile", metavar="STAGE[:tracemalloc]", default=None,
+                         help="profile one stage (decode, resample, dither, classify, pack, grid, or export for .ans/.html/.png outputs) with cProfile, or tracemalloc with the suffix")
+    convert.add_argument("--profile-dir", default=None, help="directory for profile output (default: current directory)")
+    convert.set_defaults(func=convert_command)
+
+    text = commands.add_parser("text", help="render banner text with a TrueType/OpenType font to a .ddraw file, ANSI, HTML or preview PNG")
+    text.add_argument("text", nargs="?", default="", help="text to render (use --text-file for several lines)")
+    text.add_argument("--text-file", default=None, help="read the text from this UTF-8 file instead")
+    add_output_arguments(text)
+    text.add_argument("--font", default=None, help="TTF/OTF font file (default: Pillow's built-in font, which needs Pillow 10.1 or newer)")
+    text.add_argument("--size", type=int, default=64, help="font size in pixels (default: 64)")
+    text.add_argument("--color", default="", help="text color, e.g. #000000")
+    text.add_argument("--bg-color", default="", help="background color; without one, only cells the text covers are written")
+    add_image_arguments(text)
+    text.set_defaults(func=text_command)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,1724 @@
+# Conversion, rendering and deployment core shared by the GUI and the command line; no Qt imports
+import sys, os, threading, websocket, json, time, builtins, hashlib, collections, multiprocessing, functools, mmap, struct, re, unicodedata, contextlib, cProfile, tracemalloc, zlib, html
+from concurrent.futures import ProcessPoolExecutor
+import PIL
+from PIL import Image
+import numpy as np
+
+QUADRANT_MAP = {
+    (1, 1, 1, 1): '█', (0, 0, 0, 0): ' ',
+    (1, 0, 0, 0): '▘', (0, 1, 0, 0): '▝',
+    (0, 0, 1, 0): '▖', (0, 0, 0, 1): '▗',
+    (1, 1, 0, 0): '▀', (0, 0, 1, 1): '▄',
+    (1, 0, 1, 0): '▌', (0, 1, 0, 1): '▐',
+    (1, 0, 1, 1): '▙', (0, 1, 1, 1): '▟',
+    (1, 1, 1, 0): '▛', (1, 1, 0, 1): '▜',
+    (1, 0, 0, 1): '▚', (0, 1, 1, 0): '▞'
+}
+SQUARE_WIDTH = 16
+SQUARE_HEIGHT = 8
+ASPECT_X = 1.20
+ASPECT_Y = 0.70
+
+# Converted grids are cached here, keyed on the source bytes and conversion settings
+CACHE_DIR = os.environ.get("DREAMDRAWER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "dreamdrawer")
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_VERSION = 4
+# Rows of cells converted (and turned into edits) at a time; a multiple of SQUARE_HEIGHT
+STRIP_ROWS = 64
+# Image cells whose most opaque pixel has a lower alpha than this are left empty (no edit)
+ALPHA_THRESHOLD = 1
+
+deployment_active = False
+current_ws_connections = []
+global_log_function = None
+
+# Custom print function that redirects to the log function set by the GUI.
+# Called from any thread, so the log function must be thread-safe (the GUI only queues the line).
+def print(*args, **kwargs):
+    message = ' '.join(str(arg) for arg in args)
+    if global_log_function:
+        global_log_function(message)
+    else:
+        # Fallback to regular print if no GUI is attached
+        builtins.print(message, **kwargs)
+
+def set_log_function(log_function):
+    global global_log_function
+    global_log_function = log_function
+
+# Cell grid for an image: the size stretched to compensate for OWOT's tall character cells
+# (+20% width, -30% height), divided into cells of cell x cell pixels
+def grid_size(width, height, cell=1):
+    return int(width * ASPECT_X) // cell, int(height * ASPECT_Y) // cell
+
+def has_alpha(img):
+    return img.mode in ("RGBA", "RGBa", "LA", "La", "PA") or "transparency" in img.info
+
+# Resample an image in memory to exactly cols*sub_x x rows*sub_y pixels, RGBA if it has transparency, else RGB.
+# With linear, color channels are filtered in linear light rather than on sRGB values.
+# The source is decoded whole (4 bytes per pixel, less for JPEGs far larger than the target thanks to draft)
+# before the resampled image is made, so conversion memory grows with the source size, not just the strip.
+def resample_to_grid(img, cols, rows, sub_x=1, sub_y=1, linear=False):
+    target = (max(cols * sub_x, 1), max(rows * sub_y, 1))
+    mode = "RGBA" if has_alpha(img) else "RGB"
+    # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale; keep at least twice the target for the final filter
+    img.draft("RGB", (target[0] * 2, target[1] * 2))
+    with timed("decode"):
+        img.load()
+    with timed("resample"):
+        if img.mode != mode:
+            img = img.convert(mode)
+        # Cheap box reduction for whatever is still far larger than the target
+        factor = min(img.width // (target[0] * 2), img.height // (target[1] * 2))
+        if linear:
+            return resize_linear(img, target, factor)
+        if factor >= 2:
+            img = img.reduce(factor)
+        return img.resize(target, Image.LANCZOS)
+
+# reduce + resize of each band as 32-bit float, colors in linear light. With alpha, colors are premultiplied
+# before filtering and divided back out after, as Pillow does for RGBA, so transparent pixels don't bleed.
+def resize_linear(img, target, factor=1):
+    def resize(array):
+        band = Image.fromarray(array)
+        if factor >= 2:
+            band = band.reduce(factor)
+        return np.asarray(band.resize(target, Image.LANCZOS))
+    names = img.getbands()
+    arrays = [np.asarray(band) for band in img.split()]
+    alpha = coverage = None
+    if "A" in names:
+        alpha = arrays[names.index("A")].astype(np.float32) / 255
+        coverage = np.clip(resize(alpha), 0, 1)
+    bands = []
+    for name, array in zip(names, arrays):
+        if name == "A":
+            bands.append(np.rint(coverage * 255).astype(np.uint8))
+            continue
+        linear = SRGB_TO_LINEAR[array]
+        if alpha is None:
+            bands.append(linear_to_srgb(resize(linear)))
+        else:
+            color = resize(linear * alpha)
+            bands.append(linear_to_srgb(np.divide(color, coverage, out=np.zeros_like(color), where=coverage > 0)))
+    return Image.fromarray(np.stack(bands, axis=-1), img.mode)
+
+def parse_proxy_file(filename):
+    proxies = []
+    try:
+        with open(filename, 'r') as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                
+                # Remove protocol prefix if present
+                if line.startswith('http://'):
+                    line = line[7:]
+                elif line.startswith('socks5://'):
+                    line = line[9:]
+                elif line.startswith('socks4://'):
+                    line = line[9:]
+                
+                parts = line.split(':')
+                
+                if len(parts) >= 2:
+                    host = parts[0].strip()
+                    try:
+                        port = int(parts[1].strip())
+                        proxy = {"host": host, "port": port}
+                        
+                        # Add auth if provided
+                        if len(parts) >= 4:
+                            proxy["auth"] = f"{parts[2].strip()}:{parts[3].strip()}"
+                        
+                        proxies.append(proxy)
+                    except ValueError:
+                        print(f"[X] Invalid port in line {line_num}: {line}")
+                else:
+                    print(f"[X] Invalid format in line {line_num}: {line}")
+                    
+    except FileNotFoundError:
+        print(f"[X] Proxy file not found: {filename}")
+        return []
+    except Exception as e:
+        print(f"[X] Error reading proxy file: {e}")
+        return []
+    
+    print(f"[!] Loaded {len(proxies)} proxies from {filename}")
+    return proxies
+
+def brightness(rgb):
+    r, g, b = rgb
+    return 0.299 * r + 0.587 * g + 0.114 * b
+
+def choose_quadrant(pixels):
+    avg_brightness = sum(brightness(p) for p in pixels) / 4
+    return tuple(1 if brightness(p) < avg_brightness else 0 for p in pixels)
+
+def average_color(pixels):
+    r = sum(p[0] for p in pixels) // len(pixels)
+    g = sum(p[1] for p in pixels) // len(pixels)
+    b = sum(p[2] for p in pixels) // len(pixels)
+    return (r, g, b)
+
+# Codepoint for every 4-bit quadrant pattern (bit 3 = top-left ... bit 0 = bottom-right)
+QUADRANT_CODEPOINTS = np.array(
+    [ord(QUADRANT_MAP[((i >> 3) & 1, (i >> 2) & 1, (i >> 1) & 1, i & 1)]) for i in range(16)],
+    dtype=np.uint32
+)
+QUADRANT_PATTERNS = np.array([[(i >> bit) & 1 for bit in (3, 2, 1, 0)] for i in range(16)], dtype=bool)
+
+# 2x3 sextant characters (Symbols for Legacy Computing). Bit 0 = top-left, 1 = top-right, 2 = middle-left ...
+# 5 = bottom-right. The four patterns that already exist as older block characters are skipped in the U+1FB00 range.
+def sextant_codepoint(n):
+    existing = {0: ' ', 21: '▌', 42: '▐', 63: '█'}
+    if n in existing:
+        return ord(existing[n])
+    return 0x1FB00 + n - 1 - (n > 21) - (n > 42)
+
+SEXTANT_CODEPOINTS = np.array([sextant_codepoint(n) for n in range(64)], dtype=np.uint32)
+SEXTANT_PATTERNS = np.array([[(n >> bit) & 1 for bit in range(6)] for n in range(64)], dtype=bool)
+
+# Glyph sets for block encoding: (block width, block height, patterns in reading order, codepoints)
+GLYPH_SETS = {
+    "quadrant": (2, 2, QUADRANT_PATTERNS, QUADRANT_CODEPOINTS),
+    "sextant": (2, 3, SEXTANT_PATTERNS, SEXTANT_CODEPOINTS),
+}
+
+# Split an RGB array into (rows, cols, block_w * block_h, 3) int32 blocks, pixels in reading order
+def split_blocks(rgb, block_w, block_h):
+    rows, cols = rgb.shape[0] // block_h, rgb.shape[1] // block_w
+    rgb = rgb[:rows * block_h, :cols * block_w].astype(np.int32)
+    return rgb.reshape(rows, block_h, cols, block_w, 3).transpose(0, 2, 1, 3, 4).reshape(rows, cols, block_h * block_w, 3)
+
+# Pattern index of every block: pixels darker than the block's mean brightness (as choose_quadrant does)
+def threshold_patterns(block, patterns):
+    # Same float operations and summation order as brightness/choose_quadrant so ties match exactly
+    r, g, b = block[..., 0], block[..., 1], block[..., 2]
+    lum = 0.299 * r + 0.587 * g + 0.114 * b
+    avg = lum[..., 0]
+    for i in range(1, lum.shape[-1]):
+        avg = avg + lum[..., i]
+    avg = avg / lum.shape[-1]
+    dark = lum < avg[..., None]
+    # Patterns enumerate every combination, so a block's index is the sum of its dark pixels'
+    # single-pixel pattern indices
+    single = patterns.sum(axis=1) == 1
+    weights = np.array([np.flatnonzero(single & patterns[:, i])[0] for i in range(patterns.shape[1])])
+    return (dark * weights).sum(axis=-1)
+
+# Pattern index of every block that minimises the squared RGB error of its best two-color fit,
+# searched over all patterns at once. Blocks are processed in batches to bound memory.
+def bestfit_patterns(block, patterns, batch=16384):
+    rows, cols, size, _ = block.shape
+    flat = block.reshape(-1, size, 3).astype(np.float64)
+    on = patterns.astype(np.float64)                      # (patterns, size)
+    on_count = on.sum(axis=1)
+    off_count = size - on_count
+    # 1 / count, with empty sides contributing nothing
+    inv_on = np.divide(1.0, on_count, out=np.zeros_like(on_count), where=on_count > 0)
+    inv_off = np.divide(1.0, off_count, out=np.zeros_like(off_count), where=off_count > 0)
+    result = np.empty(len(flat), dtype=np.int64)
+    for start in range(0, len(flat), batch):
+        chunk = flat[start:start + batch]
+        on_sum = np.matmul(chunk.transpose(0, 2, 1), on.T)   # (n, 3, patterns)
+        off_sum = chunk.sum(axis=1)[:, :, None] - on_sum
+        # SSE = sum(x^2) - sum_sides(|side sum|^2 / side count); maximise the subtracted term
+        score = ((on_sum ** 2).sum(axis=1) * inv_on) + ((off_sum ** 2).sum(axis=1) * inv_off)
+        result[start:start + batch] = score.argmax(axis=1)
+    return result.reshape(rows, cols)
+
+# Packed fg/bg colors: average_color of the pattern's "on" and "off" pixels,
+# falling back to the whole block when one side is empty. With linear, the averages are taken in linear light.
+def block_colors(block, dark, linear=False):
+    size = block.shape[-2]
+    if linear:
+        block = SRGB_TO_LINEAR[block]
+    dark_count = dark.sum(axis=-1)
+    light_count = size - dark_count
+    dark_sum = (block * dark[..., None]).sum(axis=-2)
+    total_sum = block.sum(axis=-2)
+    light_sum = total_sum - dark_sum
+    dark_sum = np.where(dark_count[..., None] == 0, total_sum, dark_sum)
+    light_sum = np.where(light_count[..., None] == 0, total_sum, light_sum)
+    dark_count = np.where(dark_count == 0, size, dark_count)
+    light_count = np.where(light_count == 0, size, light_count)
+    if linear:
+        return pack_rgb(linear_to_srgb(dark_sum / dark_count[..., None])), pack_rgb(linear_to_srgb(light_sum / light_count[..., None]))
+    return pack_rgb(dark_sum // dark_count[..., None]), pack_rgb(light_sum // light_count[..., None])
+
+# Encode every block of an RGB array as one glyph of the set plus fg/bg colors.
+# method "threshold" splits on mean brightness, "bestfit" searches every pattern for the lowest color error.
+# Returns (codepoints, fg, bg) arrays of shape (height // block_h, width // block_w), colors packed as 0xRRGGBB.
+def encode_blocks(rgb, glyphs="quadrant", method="threshold", linear=False):
+    block_w, block_h, patterns, codepoints = GLYPH_SETS[glyphs]
+    with timed("classify"):
+        block = split_blocks(rgb, block_w, block_h)
+        if method == "bestfit":
+            pattern = bestfit_patterns(block, patterns)
+        else:
+            pattern = threshold_patterns(block, patterns)
+    with timed("pack"):
+        fg, bg = block_colors(block, patterns[pattern], linear)
+    return codepoints[pattern], fg, bg
+
+# Vectorized version of choose_quadrant + average_color over a whole RGB array
+def encode_quadrants(rgb, linear=False):
+    return encode_blocks(rgb, "quadrant", "threshold", linear)
+
+def pack_rgb(rgb):
+    rgb = rgb.astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+# Read a PIL RGB or RGBA image once as a (height, width, 3 or 4) uint8 array without per-pixel access
+def pixel_array(img):
+    width, height = img.size
+    return np.frombuffer(img.tobytes(), dtype=np.uint8).reshape(height, width, len(img.getbands()))
+
+# sRGB <-> linear light lookup tables. Decoding is exact per 8-bit value; encoding rounds to the
+# nearest of LINEAR_STEPS linear values, fine enough that every 8-bit value survives a round trip.
+LINEAR_STEPS = 4096
+
+def srgb_to_linear_value(value):
+    value /= 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+def linear_to_srgb_value(value):
+    value = 12.92 * value if value <= 0.0031308 else 1.055 * value ** (1 / 2.4) - 0.055
+    return round(value * 255)
+
+SRGB_TO_LINEAR = np.array([srgb_to_linear_value(v) for v in range(256)], dtype=np.float32)
+LINEAR_TO_SRGB = np.array([linear_to_srgb_value(i / (LINEAR_STEPS - 1)) for i in range(LINEAR_STEPS)], dtype=np.uint8)
+
+def linear_to_srgb(linear):
+    index = np.rint(np.clip(linear, 0, 1) * (LINEAR_STEPS - 1)).astype(np.intp)
+    return LINEAR_TO_SRGB[index]
+
+# Dithering: a posterize effect that reduces each channel to levels evenly spaced sRGB values before
+# encoding, choosing between them in linear light, so the reduced palette shows as fine patterns rather
+# than flat bands. It runs before the cell averaging and makes cells less accurate, not more.
+DITHER_LEVELS = 8
+# Rows error-diffused at a time; the error leaving a band's last row carries into the next band
+DITHER_BAND_ROWS = 512
+
+# Threshold map for ordered dithering, values in (0, 1)
+def bayer_matrix(size=8):
+    matrix = np.zeros((1, 1))
+    while matrix.shape[0] < size:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return ((matrix + 0.5) / matrix.size).astype(np.float32)
+
+BAYER_MATRIX = bayer_matrix()
+
+# The levels' sRGB values and their linear light values
+def dither_palette(levels):
+    codes = np.rint(np.arange(levels) * 255 / (levels - 1)).astype(np.uint8)
+    return codes, SRGB_TO_LINEAR[codes]
+
+# Ordered dithering: each value rounds up to the next level where its distance past the level below
+# (in linear light) exceeds the pixel's Bayer threshold. top is the first row's y in the image, so strips line up.
+def dither_bayer(rgb, levels=DITHER_LEVELS, top=0):
+    codes, linear = dither_palette(levels)
+    # Level below and fraction of the way to the next level for every 8-bit value
+    low = np.clip(np.searchsorted(linear, SRGB_TO_LINEAR, side="right") - 1, 0, levels - 2)
+    fraction = ((SRGB_TO_LINEAR - linear[low]) / (linear[low + 1] - linear[low])).astype(np.float32)
+    size = BAYER_MATRIX.shape[0]
+    ys = (top + np.arange(rgb.shape[0])) % size
+    xs = np.arange(rgb.shape[1]) % size
+    up = fraction[rgb] > BAYER_MATRIX[ys[:, None], xs[None, :], None]
+    return codes[low.astype(np.uint8)[rgb] + up]
+
+# Floyd-Steinberg error diffusion in linear light. Pixel (y, x) only takes error from pixels quantized
+# before step x + 2y, so each step quantizes one pixel of every row at once. The band is stored skewed,
+# buf[x + 2y, y], which makes every step and the four error targets contiguous slices.
+def dither_floyd_steinberg(rgb, levels=DITHER_LEVELS, band_rows=None):
+    codes, linear = dither_palette(levels)
+    midpoints = (linear[1:] + linear[:-1]) / 2
+    height, width = rgb.shape[:2]
+    band_rows = band_rows or DITHER_BAND_ROWS
+    out = np.empty_like(rgb)
+    carry = np.zeros((width, 3), dtype=np.float32)
+    for top in range(0, height, band_rows):
+        rows = min(band_rows, height - top)
+        ys, xs = np.mgrid[0:rows, 0:width]
+        skew = xs + 2 * ys
+        # Error pushed past either edge lands in cells no step reads; row `rows` collects the carry
+        buf = np.zeros((width + 2 * rows + 2, rows + 1, 3), dtype=np.float32)
+        buf[skew, ys] = SRGB_TO_LINEAR[rgb[top:top + rows]]
+        buf[np.arange(width), 0] += carry
+        index = np.zeros((width + 2 * rows, rows, 3), dtype=np.uint8)
+        for step in range(width + 2 * (rows - 1)):
+            first, last = max(0, (step - width + 2) // 2), min(rows - 1, step // 2) + 1
+            value = buf[step, first:last]
+            level = np.searchsorted(midpoints, value)
+            error = value - linear[level]
+            index[step, first:last] = level
+            buf[step + 1, first:last] += error * np.float32(7 / 16)
+            buf[step + 1, first + 1:last + 1] += error * np.float32(3 / 16)
+            buf[step + 2, first + 1:last + 1] += error * np.float32(5 / 16)
+            buf[step + 3, first + 1:last + 1] += error * np.float32(1 / 16)
+        out[top:top + rows] = codes[index[skew, ys]]
+        carry = buf[np.arange(width) + 2 * rows, rows]
+    return out
+
+DITHER_METHODS = {
+    "bayer": dither_bayer,
+    "floyd-steinberg": dither_floyd_steinberg,
+}
+
+# Dither an RGB or RGBA image's color channels with one of DITHER_METHODS; alpha is kept
+def dither_image(img, method, levels=DITHER_LEVELS):
+    pixels = pixel_array(img)
+    rgb = DITHER_METHODS[method](pixels[..., :3], levels)
+    if pixels.shape[2] == 4:
+        rgb = np.concatenate([rgb, pixels[..., 3:]], axis=-1)
+    return Image.fromarray(rgb, img.mode)
+
+# Tile and in-tile coordinates of a rows x cols area whose top-left char is at (x, y).
+# Returns (block_y, block_x, part_y, part_x) arrays of shape (rows, cols).
+def tile_coordinates(x, y, cols, rows):
+    block_x, part_x = np.divmod(x + np.arange(cols), SQUARE_WIDTH)
+    block_y, part_y = np.divmod(y + np.arange(rows), SQUARE_HEIGHT)
+    shape = (rows, cols)
+    return (np.broadcast_to(block_y[:, None], shape), np.broadcast_to(block_x[None, :], shape),
+            np.broadcast_to(part_y[:, None], shape), np.broadcast_to(part_x[None, :], shape))
+
+# Background value for cells that keep the canvas' own background color
+NO_COLOR = 0xFFFFFFFF
+# Codepoints from here on stand for multi-codepoint grapheme clusters: grid.clusters[codepoint - CLUSTER_BASE]
+CLUSTER_BASE = 0x110000
+
+# .ddraw file: a 64 byte little-endian header (magic, version, flags, rows, cols, x, y) followed by
+# the codepoint, fg and bg arrays as contiguous uint32 rows, then the mask as one byte per cell,
+# then the grapheme clusters as a uint32 byte count and NUL-separated UTF-8
+DDRAW_MAGIC = b"DDRAW\0\r\n"
+DDRAW_VERSION = 2
+DDRAW_HEADER = struct.Struct("<8sHHIIqq")
+DDRAW_HEADER_SIZE = 64
+DDRAW_HAS_MASK = 1
+DDRAW_HAS_CLUSTERS = 2
+
+class CellGrid:
+    """Converted art shared by every mode: one codepoint, fg and bg color (0xRRGGBB) per cell.
+
+    The three parallel uint32 arrays have shape (rows, cols). (x, y) is the absolute char
+    position of the top-left cell. Cells where the optional mask is False produce no edit.
+    Cells holding a multi-codepoint grapheme cluster store CLUSTER_BASE + its index in clusters.
+    """
+    def __init__(self, codepoints, fg, bg, mask=None, x=0, y=0, clusters=None):
+        self.codepoints = codepoints
+        self.fg = fg
+        self.bg = bg
+        self.mask = mask
+        self.x = x
+        self.y = y
+        self.clusters = clusters
+
+    @property
+    def rows(self):
+        return self.codepoints.shape[0]
+
+    @property
+    def cols(self):
+        return self.codepoints.shape[1]
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.codepoints, self.fg, self.bg, self.mask) if a is not None)
+
+    # Number of cells that will be written
+    def __len__(self):
+        return int(self.mask.sum()) if self.mask is not None else self.rows * self.cols
+
+    # Sub-grid of cells [top:bottom, left:right]; shares memory with this grid
+    def crop(self, left, top, right, bottom):
+        area = (slice(top, bottom), slice(left, right))
+        mask = self.mask[area] if self.mask is not None else None
+        return CellGrid(self.codepoints[area], self.fg[area], self.bg[area], mask, self.x + left, self.y + top, self.clusters)
+
+    def band(self, start, stop):
+        return self.crop(0, start, self.cols, stop)
+
+    # Split the rows into count bands, the last band takes the remainder
+    def bands(self, count):
+        rows_per_band = self.rows // count
+        return [self.band(i * rows_per_band, (i + 1) * rows_per_band if i < count - 1 else self.rows)
+                for i in range(count)]
+
+    def offset(self, dx, dy):
+        return CellGrid(self.codepoints, self.fg, self.bg, self.mask, self.x + dx, self.y + dy, self.clusters)
+
+    # What wipe mode leaves behind: blank cells on the default background
+    def wiped(self):
+        shape = self.codepoints.shape
+        return CellGrid(np.full(shape, ord(" "), dtype=np.uint32), np.zeros(shape, dtype=np.uint32),
+                        np.full(shape, NO_COLOR, dtype=np.uint32), self.mask, self.x, self.y)
+
+    # Write the grid as a .ddraw file
+    def save(self, path):
+        flags = (DDRAW_HAS_MASK if self.mask is not None else 0) | (DDRAW_HAS_CLUSTERS if self.clusters else 0)
+        header = DDRAW_HEADER.pack(DDRAW_MAGIC, DDRAW_VERSION, flags, self.rows, self.cols, self.x, self.y)
+        with open(path, 'wb') as f:
+            f.write(header.ljust(DDRAW_HEADER_SIZE, b"\0"))
+            for array in (self.codepoints, self.fg, self.bg):
+                f.write(np.ascontiguousarray(array, dtype="<u4").data)
+            if self.mask is not None:
+                f.write(np.ascontiguousarray(self.mask, dtype=bool).data)
+            if self.clusters:
+                text = "\0".join(self.clusters).encode("utf-8")
+                f.write(struct.pack("<I", len(text)) + text)
+
+    # Map a .ddraw file; the arrays are read-only views into the mapping, pages load on first access
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = f.read(DDRAW_HEADER_SIZE)
+            if len(header) < DDRAW_HEADER_SIZE or not header.startswith(DDRAW_MAGIC):
+                raise ValueError(f"Not a .ddraw file: {path}")
+            _, version, flags, rows, cols, x, y = DDRAW_HEADER.unpack_from(header)
+            if version > DDRAW_VERSION:
+                raise ValueError(f"Unsupported .ddraw version {version}: {path}")
+            cells = rows * cols
+            size = DDRAW_HEADER_SIZE + cells * 12 + (cells if flags & DDRAW_HAS_MASK else 0)
+            if os.fstat(f.fileno()).st_size < size:
+                raise ValueError(f"Truncated .ddraw file: {path}")
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        def view(index):
+            return np.frombuffer(data, dtype="<u4", count=cells, offset=DDRAW_HEADER_SIZE + index * cells * 4).reshape(rows, cols)
+        mask = None
+        end = DDRAW_HEADER_SIZE + cells * 12
+        if flags & DDRAW_HAS_MASK:
+            mask = np.frombuffer(data, dtype=bool, count=cells, offset=end).reshape(rows, cols)
+            end += cells
+        clusters = None
+        if flags & DDRAW_HAS_CLUSTERS:
+            length, = struct.unpack_from("<I", data, end)
+            clusters = data[end + 4:end + 4 + length].decode("utf-8").split("\0")
+        return cls(view(0), view(1), view(2), mask, x, y, clusters)
+
+    # OWOT write edits for every non-empty cell, numbered in row-major order from start
+    def to_edits(self, wipe=False, start=0):
+        coords = tile_coordinates(self.x, self.y, self.cols, self.rows)
+        if self.mask is not None:
+            block_y, block_x, part_y, part_x = (c[self.mask].tolist() for c in coords)
+            codepoints, fg, bg = (a[self.mask].tolist() for a in (self.codepoints, self.fg, self.bg))
+        else:
+            block_y, block_x, part_y, part_x = (c.ravel().tolist() for c in coords)
+            codepoints, fg, bg = (a.ravel().tolist() for a in (self.codepoints, self.fg, self.bg))
+
+        timestamp = int(time.time())
+        if wipe:
+            return [[block_y[i], block_x[i], part_y[i], part_x[i], timestamp, " ", start + i, 0] for i in range(len(codepoints))]
+        if self.clusters:
+            chars = [self.clusters[c - CLUSTER_BASE] if c >= CLUSTER_BASE else chr(c) for c in codepoints]
+        else:
+            chars = [chr(c) for c in codepoints]
+        edits = [[block_y[i], block_x[i], part_y[i], part_x[i], timestamp, chars[i], start + i, fg[i]]
+                 for i in range(len(chars))]
+        for edit, color in zip(edits, bg):
+            if color != NO_COLOR:
+                edit.append(color)
+        return edits
+
+    # Same edits as to_edits, generated strip by strip and yielded in chunks of chunk_size
+    def iter_edits(self, chunk_size, wipe=False, strip_rows=None):
+        strip_rows = strip_rows or STRIP_ROWS
+        pending = []
+        count = 0
+        for top in range(0, self.rows, strip_rows):
+            edits = self.band(top, top + strip_rows).to_edits(wipe, count)
+            count += len(edits)
+            pending.extend(edits)
+            while len(pending) >= chunk_size:
+                yield pending[:chunk_size]
+                del pending[:chunk_size]
+        if pending:
+            yield pending
+
+    # Stack grids of equal width (e.g. tiles from iter_image_tiles) into one grid
+    @classmethod
+    def concat(cls, grids):
+        grids = list(grids)
+        if any(g.mask is not None for g in grids):
+            mask = np.concatenate([g.mask if g.mask is not None else np.ones(g.codepoints.shape, dtype=bool) for g in grids])
+        else:
+            mask = None
+        codepoints = [g.codepoints for g in grids]
+        clusters = None
+        if any(g.clusters for g in grids):
+            # Renumber each grid's clusters after those of the grids before it
+            clusters = []
+            for i, g in enumerate(grids):
+                if g.clusters:
+                    codepoints[i] = np.where(g.codepoints >= CLUSTER_BASE, g.codepoints + len(clusters), g.codepoints)
+                    clusters.extend(g.clusters)
+        return cls(np.concatenate(codepoints), np.concatenate([g.fg for g in grids]),
+                   np.concatenate([g.bg for g in grids]), mask, grids[0].x, grids[0].y, clusters)
+
+# "#rrggbb" or "rrggbb" as 0xRRGGBB; empty text gives default. Anything else (wrong length, more than
+# 24 bits, NO_COLOR) is a ValueError.
+HEX_COLOR = re.compile(r"#?([0-9a-fA-F]{6})")
+
+def parse_color(text, default=None):
+    if not text:
+        return default
+    match = HEX_COLOR.fullmatch(text)
+    if match is None:
+        raise ValueError(f"expected #rrggbb, got {text!r}")
+    return int(match.group(1), 16)
+
+# Inline color markup for the ASCII modes: {#rrggbb} sets the text color, {#rrggbb/#rrggbb} the text and
+# background, {/#rrggbb} the background only, {/} goes back to the default colors and {{ is a literal {
+COLOR_MARKUP = re.compile(r"\{\{|\{(#[0-9a-fA-F]{6})?(/(#[0-9a-fA-F]{6})?)?\}")
+
+# Strip the markup from text. Returns the plain text and the fg and bg color of each of its codepoints.
+def parse_markup(text, color, bg_color):
+    pieces, fgs, bgs = [], [], []
+    fg, bg = color, bg_color
+    position = 0
+    for match in COLOR_MARKUP.finditer(text):
+        tag = match.group(0)
+        if tag == "{}":
+            continue
+        pieces.append(text[position:match.start()])
+        fgs.append(fg)
+        bgs.append(bg)
+        position = match.end()
+        if tag == "{{":
+            pieces.append("{")
+            fgs.append(fg)
+            bgs.append(bg)
+        elif tag == "{/}":
+            fg, bg = color, bg_color
+        else:
+            fg = parse_color(match.group(1), fg)
+            if match.group(2):
+                bg = parse_color(match.group(3), bg_color)
+    pieces.append(text[position:])
+    fgs.append(fg)
+    bgs.append(bg)
+    lengths = [len(piece) for piece in pieces]
+    return ("".join(pieces), np.repeat(np.array(fgs, dtype=np.uint32), lengths),
+            np.repeat(np.array(bgs, dtype=np.uint32), lengths))
+
+# Cells taken by a codepoint: 0 for marks and format characters that attach to the previous
+# character, 2 for East Asian wide and fullwidth characters, 1 for everything else
+@functools.lru_cache(maxsize=None)
+def char_width(codepoint):
+    char = chr(codepoint)
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf") or 0x1F3FB <= codepoint <= 0x1F3FF:
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+# char_width of every codepoint in an array; only distinct codepoints are looked up
+def codepoint_widths(codepoints):
+    bmp = codepoints < 0x10000
+    all_bmp = bmp.all()
+    table = np.ones(0x10000, dtype=np.int8)
+    present = np.flatnonzero(np.bincount(codepoints if all_bmp else codepoints[bmp], minlength=0x10000))
+    table[present] = [char_width(cp) for cp in present.tolist()]
+    if all_bmp:
+        return table[codepoints]
+    widths = np.ones(len(codepoints), dtype=np.int8)
+    widths[bmp] = table[codepoints[bmp]]
+    astral, inverse = np.unique(codepoints[~bmp], return_inverse=True)
+    widths[~bmp] = np.array([char_width(cp) for cp in astral.tolist()], dtype=np.int8)[inverse]
+    return widths
+
+ZWJ = 0x200D
+REGIONAL_INDICATORS = (0x1F1E6, 0x1F1FF)
+
+# Lay text out on a grid the way a monospace editor shows it: one cell per grapheme cluster (a character
+# with its combining marks, ZWJ emoji sequences, flag pairs), two for wide characters with the second cell
+# left empty. Lines shorter than the longest one are masked out past their end. Runs in array operations
+# over the whole text; only clusters of several codepoints become Python strings.
+def layout_text(text, color, bg_color=None, markup=False):
+    bg_color = NO_COLOR if bg_color is None else bg_color
+    if markup:
+        text, fg_chars, bg_chars = parse_markup(text, color, bg_color)
+    codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    count = len(codepoints)
+    newline = codepoints == ord("\n")
+    widths = codepoint_widths(codepoints)
+
+    # A codepoint joins the cluster before it if it is zero-width, follows a ZWJ or completes a flag pair
+    joins = widths == 0
+    joins[1:] |= codepoints[:-1] == ZWJ
+    regional = (codepoints >= REGIONAL_INDICATORS[0]) & (codepoints <= REGIONAL_INDICATORS[1])
+    if regional.any():
+        index = np.arange(count)
+        run_start = np.maximum.accumulate(np.where(regional & ~np.r_[False, regional[:-1]], index, 0))
+        joins |= regional & ((index - run_start) % 2 == 1)
+    # ...but never across or right after a line break
+    joins &= ~newline
+    joins[1:] &= ~newline[:-1]
+    if count:
+        joins[0] = False
+
+    starts = np.flatnonzero(~joins & ~newline)
+    row = np.cumsum(newline, dtype=np.intp)[starts]
+    # Wide characters and flags take two cells
+    cell_width = np.where((widths[starts] == 2) | regional[starts], 2, 1)
+    before = np.cumsum(cell_width, dtype=np.intp) - cell_width
+    first_in_row = np.r_[True, row[1:] != row[:-1]] if len(row) else np.zeros(0, dtype=bool)
+    col = before - np.maximum.accumulate(np.where(first_in_row, before, 0))
+
+    rows = int(newline.sum()) + (1 if count and not newline[-1] else 0)
+    cols = int((col + cell_width).max()) if len(col) else 0
+    cells = codepoints[starts]
+    clusters = None
+    if joins.any():
+        # Each cluster ends where the next one (or the line break after it) begins
+        boundaries = np.r_[np.flatnonzero(~joins), count]
+        ends = boundaries[np.cumsum(~joins, dtype=np.intp)[starts]]
+        multi = np.flatnonzero(ends - starts > 1)
+        table = {}
+        ids = [table.setdefault(text[start:end], len(table)) for start, end in zip(starts[multi].tolist(), ends[multi].tolist())]
+        cells[multi] = CLUSTER_BASE + np.array(ids, dtype=np.uint32)
+        clusters = list(table)
+
+    grid = CellGrid(np.full((rows, cols), ord(" "), dtype=np.uint32), np.full((rows, cols), color, dtype=np.uint32),
+                    np.full((rows, cols), bg_color, dtype=np.uint32), np.zeros((rows, cols), dtype=bool), clusters=clusters)
+    flat = row * cols + col
+    grid.codepoints.ravel()[flat] = cells
+    grid.mask.ravel()[flat] = True
+    if markup:
+        grid.fg.ravel()[flat] = fg_chars[starts]
+        grid.bg.ravel()[flat] = bg_chars[starts]
+    return grid
+
+# One blank cell per pixel, painted with the pixel color as background
+def pixel_grid(rgb, linear=False):
+    shape = rgb.shape[:2]
+    with timed("pack"):
+        bg = pack_rgb(rgb)
+    return CellGrid(np.full(shape, ord(" "), dtype=np.uint32), np.zeros(shape, dtype=np.uint32), bg)
+
+# One quadrant character per 2x2 pixel block
+def quadrant_grid(rgb, linear=False):
+    return CellGrid(*encode_quadrants(rgb, linear))
+
+# One glyph of a GLYPH_SETS entry per block
+def block_grid(rgb, glyphs="quadrant", method="threshold", linear=False):
+    return CellGrid(*encode_blocks(rgb, glyphs, method, linear))
+
+# Image encoders: (cell size in aspect-corrected image pixels, cell width and height in resampled pixels,
+# rgb array, linear -> CellGrid). Sextants cover the same area per cell as quadrants with a third pixel row.
+IMAGE_ENCODERS = {
+    "pixel": (1, 1, 1, pixel_grid),
+    "quadrant": (2, 2, 2, quadrant_grid),
+    "quadrant-fit": (2, 2, 2, functools.partial(block_grid, glyphs="quadrant", method="bestfit")),
+    "sextant": (2, 2, 3, functools.partial(block_grid, glyphs="sextant")),
+    "sextant-fit": (2, 2, 3, functools.partial(block_grid, glyphs="sextant", method="bestfit")),
+}
+
+# Encode RGB or RGBA pixels with one of IMAGE_ENCODERS. With alpha, translucent pixels are blended
+# onto OWOT's white canvas and cells whose most opaque pixel is below alpha_threshold are masked out.
+# With linear, cell colors are averaged in linear light.
+def encode_pixels(encoder, pixels, alpha_threshold=ALPHA_THRESHOLD, linear=False):
+    _, sub_x, sub_y, encode = IMAGE_ENCODERS[encoder]
+    if pixels.shape[2] == 3:
+        return encode(pixels, linear=linear)
+    with timed("pack"):
+        alpha = pixels[..., 3:].astype(np.uint32)
+        rgb = ((pixels[..., :3] * alpha + 255 * (255 - alpha) + 127) // 255).astype(np.uint8)
+    grid = encode(rgb, linear=linear)
+    with timed("grid"):
+        cell_alpha = alpha[:grid.rows * sub_y, :grid.cols * sub_x, 0].reshape(grid.rows, sub_y, grid.cols, sub_x).max(axis=(1, 3))
+        grid.mask = cell_alpha >= alpha_threshold
+    return grid
+
+# Convert an image already resampled to the encoder's grid in strips of strip_rows cells.
+# Yields CellGrid tiles positioned by their first row, so only one strip of the encoder's pixel arrays
+# is alive at a time. The strips bound only those temporaries: the resampled image passed in (and the
+# decoded source it came from, see resample_to_grid) is held whole, as is the finished grid.
+def iter_image_tiles(img, encoder, strip_rows=None, alpha_threshold=ALPHA_THRESHOLD, linear=False):
+    _, sub_x, sub_y, _ = IMAGE_ENCODERS[encoder]
+    strip_rows = max(SQUARE_HEIGHT, (strip_rows or STRIP_ROWS) // SQUARE_HEIGHT * SQUARE_HEIGHT)
+    rows = img.height // sub_y
+    for top in range(0, rows, strip_rows):
+        bottom = min(top + strip_rows, rows)
+        with timed("grid"):
+            pixels = pixel_array(img.crop((0, top * sub_y, img.width, bottom * sub_y)))
+        yield encode_pixels(encoder, pixels, alpha_threshold, linear).offset(0, top)
+
+class StageTimer:
+    """Wall time and call count per conversion stage (decode, rasterize, resample, dither, classify, pack, grid, export).
+
+    Stages are timed with timed(name) wherever the timer is active on the current thread.
+    profile names one stage to run under cProfile, or under tracemalloc with a ":tracemalloc"
+    suffix (e.g. "classify:tracemalloc"); dump() writes the result to profile_dir.
+    """
+    def __init__(self, profile=None, profile_dir=None):
+        self.stages = {}
+        self.profile_stage, _, profiler = (profile or "").partition(":")
+        self.profiler = profiler or "cprofile"
+        self.profile_dir = profile_dir or os.getcwd()
+        self.profile = None
+        self.snapshot = None
+        self.traced_peak = 0
+        self.tracing = False
+
+    @contextlib.contextmanager
+    def activate(self):
+        previous = getattr(stage_timers, "timer", None)
+        stage_timers.timer = self
+        try:
+            yield self
+        finally:
+            stage_timers.timer = previous
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        profiling = name == self.profile_stage
+        if profiling:
+            self.start_profile()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+            if profiling:
+                self.stop_profile()
+
+    def add(self, name, seconds, calls=1):
+        total, count = self.stages.get(name, (0.0, 0))
+        self.stages[name] = (total + seconds, count + calls)
+
+    # Fold in the stages timed in a worker process (their seconds are worker CPU time, not wall time)
+    def merge(self, stages):
+        for name, (seconds, calls) in stages.items():
+            self.add(name, seconds, calls)
+
+    def start_profile(self):
+        if self.profiler == "tracemalloc":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.tracing = True
+            tracemalloc.reset_peak()
+        else:
+            self.profile = self.profile or cProfile.Profile()
+            self.profile.enable()
+
+    def stop_profile(self):
+        if self.profiler == "tracemalloc":
+            self.traced_peak = max(self.traced_peak, tracemalloc.get_traced_memory()[1])
+            self.snapshot = tracemalloc.take_snapshot()
+        else:
+            self.profile.disable()
+
+    def report(self):
+        report = {"stages": {name: {"seconds": round(seconds, 6), "calls": calls}
+                             for name, (seconds, calls) in self.stages.items()},
+                  "peak_rss_mb": peak_rss_mb()}
+        if self.snapshot is not None:
+            report["traced_peak_mb"] = round(self.traced_peak / (1024 * 1024), 3)
+        return report
+
+    def summary(self):
+        return ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, (seconds, _) in self.stages.items())
+
+    # Write the profiled stage's cProfile stats or top tracemalloc allocations; returns the path or None
+    def dump(self):
+        if self.profile is not None:
+            path = os.path.join(self.profile_dir, f"dreamdrawer-{self.profile_stage}.prof")
+            self.profile.dump_stats(path)
+            return path
+        if self.snapshot is not None:
+            path = os.path.join(self.profile_dir, f"dreamdrawer-{self.profile_stage}-tracemalloc.txt")
+            with open(path, 'w') as f:
+                f.write(f"peak traced memory during {self.profile_stage}: {self.traced_peak / (1024 * 1024):.1f} MB\n")
+                for stat in self.snapshot.statistics("lineno")[:25]:
+                    f.write(f"{stat}\n")
+            if self.tracing:
+                tracemalloc.stop()
+                self.tracing = False
+            return path
+        return None
+
+stage_timers = threading.local()
+
+def current_timer():
+    return getattr(stage_timers, "timer", None)
+
+# Time a block as the named stage of the timer active on this thread; does nothing without one
+@contextlib.contextmanager
+def timed(name):
+    timer = current_timer()
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+# Restart the peak resident memory count, so peak_rss_mb() covers only what runs from here on.
+# Linux only (/proc/self/clear_refs); returns False where the peak can't be reset.
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+# Peak resident memory of this process in MB (None where it can't be measured)
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / (1024 * 1024)
+    except Exception:
+        pass
+    return None
+
+class ConversionCache:
+    """On-disk LRU cache of converted CellGrids.
+
+    Entries are keyed on a hash of the source file bytes plus the conversion parameters, so an
+    edited source or different settings never reuse a stale conversion. The least recently
+    used entries are evicted once the directory grows past max_bytes.
+    """
+    def __init__(self, directory=None, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory or CACHE_DIR
+        self.max_bytes = max_bytes
+
+    def key(self, source_file, params):
+        digest = hashlib.sha256()
+        with open(source_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digest.update(json.dumps(dict(params, version=CACHE_VERSION), sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.ddraw")
+
+    def get(self, key):
+        path = self.entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            grid = CellGrid.load(path)
+            os.utime(path)  # mark as recently used
+            return grid
+        except Exception as e:
+            print(f"[X] Dropping unreadable cache entry {path}: {e}")
+            self.remove(path)
+            return None
+
+    def put(self, key, grid):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.entry_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            grid.save(tmp_path)
+            os.replace(tmp_path, path)
+            self.evict()
+        except Exception as e:
+            print(f"[X] Could not write conversion cache: {e}")
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".ddraw"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+# Encode one strip of raw RGB(A) bytes in a worker process; results go back as flat byte buffers,
+# followed by the worker's stage timings
+def encode_strip_buffers(encoder, width, height, channels, data, alpha_threshold=ALPHA_THRESHOLD, linear=False):
+    timer = StageTimer()
+    with timer.activate():
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape(height, width, channels)
+        grid = encode_pixels(encoder, pixels, alpha_threshold, linear)
+    mask = grid.mask.tobytes() if grid.mask is not None else None
+    return grid.rows, grid.cols, grid.codepoints.tobytes(), grid.fg.tobytes(), grid.bg.tobytes(), mask, timer.stages
+
+def grid_from_buffers(rows, cols, codepoints, fg, bg, mask, stages=None):
+    timer = current_timer()
+    if timer is not None and stages:
+        timer.merge(stages)
+    shape = (rows, cols)
+    return CellGrid(np.frombuffer(codepoints, dtype=np.uint32).reshape(shape),
+                    np.frombuffer(fg, dtype=np.uint32).reshape(shape),
+                    np.frombuffer(bg, dtype=np.uint32).reshape(shape),
+                    np.frombuffer(mask, dtype=bool).reshape(shape) if mask is not None else None)
+
+# Same tiles as iter_image_tiles, encoded on a process pool. Strips are submitted in order with at
+# most two per worker in flight, so the result is identical to the serial path for any worker count.
+def iter_image_tiles_parallel(img, encoder, strip_rows=None, workers=None, alpha_threshold=ALPHA_THRESHOLD, linear=False):
+    _, sub_x, sub_y, _ = IMAGE_ENCODERS[encoder]
+    strip_rows = max(SQUARE_HEIGHT, (strip_rows or STRIP_ROWS) // SQUARE_HEIGHT * SQUARE_HEIGHT)
+    workers = workers or os.cpu_count() or 1
+    rows = img.height // sub_y
+    pending = collections.deque()
+    # spawn: forking a process that runs GUI and websocket threads is not safe. Spawned workers still
+    # re-import the launching script as __mp_main__, so from gui.py each worker loads PyQt5 too.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for top in range(0, rows, strip_rows):
+            strip = img.crop((0, top * sub_y, img.width, min(top + strip_rows, rows) * sub_y))
+            pending.append((top, pool.submit(encode_strip_buffers, encoder, strip.width, strip.height,
+                                             len(strip.getbands()), strip.tobytes(), alpha_threshold, linear)))
+            if len(pending) >= workers * 2:
+                top, future = pending.popleft()
+                yield grid_from_buffers(*future.result()).offset(0, top)
+        while pending:
+            top, future = pending.popleft()
+            yield grid_from_buffers(*future.result()).offset(0, top)
+
+# Convert an image file to a CellGrid with one of IMAGE_ENCODERS. Pure computation, no network or cache.
+# Encoding runs in this process unless workers asks for a process pool (0 for one worker per core).
+# progress(done, total) is called with the number of cell rows converted so far.
+# dither (a DITHER_METHODS name) reduces the resampled pixels to dither_levels per channel before encoding;
+# linear resamples and averages cell colors in linear light.
+def convert_image(image_file, encoder, strip_rows=None, workers=None, alpha_threshold=ALPHA_THRESHOLD, progress=None,
+                  dither=None, dither_levels=DITHER_LEVELS, linear=False):
+    with timed("decode"):
+        img = Image.open(image_file)
+    with img:
+        return encode_image(img, encoder, strip_rows, workers, alpha_threshold, progress, dither, dither_levels, linear, image_file)
+
+# convert_image for an image already in memory; name is only used in the log line
+def encode_image(img, encoder, strip_rows=None, workers=None, alpha_threshold=ALPHA_THRESHOLD, progress=None,
+                 dither=None, dither_levels=DITHER_LEVELS, linear=False, name="image"):
+    cell, sub_x, sub_y, _ = IMAGE_ENCODERS[encoder]
+    cols, rows = grid_size(img.width, img.height, cell)
+    if not cols or not rows:
+        raise ValueError(f"{img.width}x{img.height} image is too small for one {encoder} cell")
+    print(f"[!] Converting image to {cols}x{rows} cells: {name}")
+    img = resample_to_grid(img, cols, rows, sub_x, sub_y, linear)
+    if dither:
+        with timed("dither"):
+            img = dither_image(img, dither, dither_levels)
+
+    # Opt-in: starting spawn workers costs more than it saves below millions of cells
+    if workers is None:
+        workers = 1
+    elif workers == 0:
+        workers = os.cpu_count() or 1
+    timer = current_timer()
+    if timer is not None and timer.profile_stage:
+        # Profilers only see this process
+        workers = 1
+    if workers > 1:
+        tiles = iter_image_tiles_parallel(img, encoder, strip_rows, workers, alpha_threshold, linear)
+    else:
+        tiles = iter_image_tiles(img, encoder, strip_rows, alpha_threshold, linear)
+    parts = []
+    for tile in tiles:
+        parts.append(tile)
+        if progress:
+            progress(tile.y + tile.rows, rows)
+    with timed("grid"):
+        return CellGrid.concat(parts)
+
+# Load the image as a CellGrid for the given IMAGE_ENCODERS entry, reusing a cached conversion.
+# Optional args attributes: cache_dir, strip_rows, workers, alpha_threshold, progress, dither, dither_levels, linear.
+def prepare_image_for_mode(image_file, encoder, args=None):
+    if not os.path.exists(image_file):
+        print(f"[X] Image file not found: {image_file}")
+        return None
+
+    alpha_threshold = getattr(args, 'alpha_threshold', ALPHA_THRESHOLD)
+    dither = getattr(args, 'dither', None)
+    dither_levels = getattr(args, 'dither_levels', DITHER_LEVELS)
+    linear = getattr(args, 'linear', False)
+    cache = ConversionCache(getattr(args, 'cache_dir', None))
+    key = cache.key(image_file, {"encoder": encoder, "aspect": [ASPECT_X, ASPECT_Y], "alpha_threshold": alpha_threshold,
+                                 "dither": dither, "dither_levels": dither_levels if dither else None, "linear": linear})
+    # A cache hit runs no stage, so a profiled conversion always converts
+    timer = current_timer()
+    if timer is not None and timer.profile_stage:
+        print(f"[!] Profiling {timer.profile_stage}, converting without the cache")
+    else:
+        grid = cache.get(key)
+        if grid is not None:
+            print(f"[!] Using cached conversion of: {image_file}")
+            return grid
+
+    scoped = reset_peak_rss()
+    try:
+        grid = convert_image(image_file, encoder, getattr(args, 'strip_rows', None), getattr(args, 'workers', None),
+                             alpha_threshold, getattr(args, 'progress', None), dither, dither_levels, linear)
+    except Exception as e:
+        print(f"[X] Error converting image: {e}")
+        return None
+
+    if grid.mask is not None:
+        print(f"[!] Skipping {grid.rows * grid.cols - len(grid)} transparent cells")
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"[!] Conversion done, peak RSS {peak:.0f} MB " + ("during conversion" if scoped else "(whole process so far)"))
+    cache.put(key, grid)
+    return grid
+
+# Convert a mode's input (args.ascii_file or args.image_file) into a CellGrid at the origin, without sending.
+# Any mode takes a saved .ddraw file as input and sends it as is.
+# Stages are timed on args.timer. If unset, a fresh StageTimer is made from args.profile or DREAMDRAWER_PROFILE
+# ("stage" or "stage:tracemalloc"), and its profile is written to args.profile_dir once the grid is built;
+# a caller passing its own timer writes the profile itself (write_profile) when its last stage is done.
+def build_grid(args):
+    timer = getattr(args, 'timer', None)
+    owned = timer is None
+    if owned:
+        timer = StageTimer(getattr(args, 'profile', None) or os.environ.get("DREAMDRAWER_PROFILE"),
+                           getattr(args, 'profile_dir', None))
+        args.timer = timer
+    with timer.activate():
+        grid = load_or_convert(args)
+    if timer.stages:
+        print(f"[TIME] {timer.summary()}")
+    if owned:
+        write_profile(timer)
+    progress = getattr(args, 'progress', None)
+    if progress and grid is not None:
+        progress(1, 1)
+    return grid
+
+# Write the profile of the timer's profiled stage, or say why there is none
+def write_profile(timer):
+    if not timer.profile_stage:
+        return None
+    if timer.profile_stage not in timer.stages:
+        print(f"[!] Stage {timer.profile_stage} did not run, no profile written")
+        return None
+    try:
+        path = timer.dump()
+    except OSError as e:
+        print(f"[X] Error writing profile: {e}")
+        return None
+    if path:
+        print(f"[!] Profile of {timer.profile_stage} written to {path}")
+    return path
+
+def load_or_convert(args):
+    input_file = args.ascii_file if args.mode in ("ascii_single", "ascii_threading") else args.image_file
+    if input_file.lower().endswith(".ddraw") and os.path.exists(input_file):
+        try:
+            with timed("decode"):
+                return CellGrid.load(input_file)
+        except Exception as e:
+            print(f"[X] Error loading {input_file}: {e}")
+            return None
+    if args.mode in ("ascii_single", "ascii_threading"):
+        if not os.path.exists(args.ascii_file):
+            print(f"Error: File not found: {args.ascii_file}")
+            return None
+        with timed("decode"):
+            with open(args.ascii_file, 'r', encoding='utf-8-sig') as f:
+                text = f.read()
+        with timed("grid"):
+            return layout_text(text, parse_color(args.color, 0), parse_color(args.bg_color), getattr(args, 'markup', False))
+    if args.mode == "image_single":
+        return prepare_image_for_mode(args.image_file, "pixel", args)
+    return prepare_image_for_mode(args.image_file, getattr(args, 'encoder', "quadrant"), args)
+
+# Send the grid's edits in chunks, args.repeat times (forever for inf), until deployment is stopped.
+# Edits are generated one strip at a time so a large grid never exists as Python lists all at once.
+def send_grid(ws, grid, args):
+    repeat = 0
+    while deployment_active and repeat < args.repeat:
+        for chunk in grid.iter_edits(args.chunk_size, args.wipe == "on"):
+            if not deployment_active:
+                break
+            ws.send(json.dumps({"kind": "write", "edits": chunk}))
+            time.sleep(args.sleep_between)
+        repeat += 1
+
+# ==== TEXT RASTERIZER ====
+# Rendered glyphs kept per (font, size, codepoint)
+GLYPH_CACHE_SIZE = 4096
+
+# A TrueType/OpenType font at a pixel size; None is Pillow's built-in font, which can only be
+# scaled from Pillow 10.1 on. Older versions have a fixed-size bitmap font and need a font file.
+@functools.lru_cache(maxsize=32)
+def load_font(font_path, size):
+    from PIL import ImageFont
+    if font_path is not None:
+        return ImageFont.truetype(font_path, size)
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        raise OSError(f"Pillow {PIL.__version__} has no scalable built-in font, pass a TTF/OTF font file") from None
+
+# Coverage bitmap of one character as (uint8 array, left, top, advance); left and top place the bitmap
+# relative to the pen position on the line's ascender, advance is how far the pen then moves
+@functools.lru_cache(maxsize=GLYPH_CACHE_SIZE)
+def glyph_bitmap(font_path, size, codepoint):
+    from PIL import ImageDraw
+    font = load_font(font_path, size)
+    char = chr(codepoint)
+    left, top, right, bottom = font.getbbox(char)
+    advance = font.getlength(char)
+    if right <= left or bottom <= top:
+        return np.zeros((0, 0), dtype=np.uint8), 0, 0, advance
+    glyph = Image.new("L", (right - left, bottom - top), 0)
+    ImageDraw.Draw(glyph).text((-left, -top), char, fill=255, font=font)
+    return np.asarray(glyph), left, top, advance
+
+# Lay out text (lines split on newlines) with the font and return its coverage as a uint8 array.
+# Characters are placed by their advance widths, without kerning, so each glyph is rendered once.
+def rasterize_text(text, font_path=None, size=64):
+    font = load_font(font_path, size)
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    lines = text.replace("\r\n", "\n").split("\n")
+    placed = []
+    width = 0
+    for row, line in enumerate(lines):
+        pen = 0.0
+        for char in line:
+            bitmap, left, top, advance = glyph_bitmap(font_path, size, ord(char))
+            if bitmap.size:
+                placed.append((bitmap, round(pen) + left, row * line_height + top))
+            pen += advance
+        width = max(width, int(np.ceil(pen)))
+    # Glyphs may overhang the advance box on either side
+    x0 = min([0] + [x for _, x, _ in placed])
+    y0 = min([0] + [y for _, _, y in placed])
+    x1 = max([width] + [x + b.shape[1] for b, x, _ in placed])
+    y1 = max([len(lines) * line_height] + [y + b.shape[0] for b, _, y in placed])
+    coverage = np.zeros((max(y1 - y0, 1), max(x1 - x0, 1)), dtype=np.uint8)
+    for bitmap, x, y in placed:
+        area = coverage[y - y0:y - y0 + bitmap.shape[0], x - x0:x - x0 + bitmap.shape[1]]
+        np.maximum(area, bitmap, out=area)
+    return coverage
+
+# Text as an image: color where the glyphs cover, transparent elsewhere (RGBA), or blended onto bg_color (RGB)
+def text_image(text, font_path=None, size=64, color=0, bg_color=None):
+    with timed("rasterize"):
+        coverage = rasterize_text(text, font_path, size)
+        rgb = np.array([(color >> 16) & 255, (color >> 8) & 255, color & 255], dtype=np.uint8)
+        if bg_color is None:
+            pixels = np.empty(coverage.shape + (4,), dtype=np.uint8)
+            pixels[..., :3] = rgb
+            pixels[..., 3] = coverage
+            return Image.fromarray(pixels, "RGBA")
+        bg = np.array([(bg_color >> 16) & 255, (bg_color >> 8) & 255, bg_color & 255], dtype=np.uint32)
+        alpha = coverage[..., None].astype(np.uint32)
+        pixels = ((rgb * alpha + bg * (255 - alpha) + 127) // 255).astype(np.uint8)
+        return Image.fromarray(pixels, "RGB")
+
+# Banner text as a CellGrid through one of IMAGE_ENCODERS, like an image with the same pixels.
+# Without bg_color, cells the glyphs don't reach are left out (see alpha_threshold).
+def convert_text(text, font_path=None, size=64, encoder="quadrant", color=0, bg_color=None,
+                 alpha_threshold=ALPHA_THRESHOLD, **options):
+    img = text_image(text, font_path, size, color, bg_color)
+    name = f"{os.path.basename(font_path) if font_path else 'default font'} {size}px text"
+    return encode_image(img, encoder, alpha_threshold=alpha_threshold, name=name, **options)
+
+# ==== OFFLINE RENDERER ====
+# Cell size in pixels for previews; fits both 2x2 quadrants and 2x3 sextants exactly
+PREVIEW_CELL_WIDTH = 4
+PREVIEW_CELL_HEIGHT = 6
+CANVAS_COLOR = 0xFFFFFF  # OWOT's default cell background
+
+class GlyphAtlas:
+    """Cell-sized coverage masks for every glyph seen so far, stacked in one array for blitting.
+
+    Block characters (quadrants, sextants, half and full blocks) are drawn geometrically; anything
+    else is rasterized once with Pillow's default font and scaled to the cell.
+    """
+    def __init__(self, cell_width, cell_height):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.ids = {}
+        self.masks = np.zeros((0, cell_height, cell_width), dtype=bool)
+        self.lock = threading.Lock()
+        self.block_patterns = {}
+        for block_w, block_h, patterns, codepoints in GLYPH_SETS.values():
+            for pattern, codepoint in zip(patterns, codepoints.tolist()):
+                self.block_patterns.setdefault(codepoint, (block_w, block_h, pattern))
+
+    # Glyph ids (indexes into masks) for an array of codepoints
+    def lookup(self, codepoints):
+        unique, inverse = np.unique(codepoints, return_inverse=True)
+        with self.lock:
+            missing = [cp for cp in unique.tolist() if cp not in self.ids]
+            if missing:
+                self.masks = np.concatenate([self.masks, np.stack([self.draw(cp) for cp in missing])])
+                for cp in missing:
+                    self.ids[cp] = len(self.ids)
+            ids = np.array([self.ids[cp] for cp in unique.tolist()], dtype=np.intp)
+        return ids[inverse].reshape(codepoints.shape)
+
+    def draw(self, codepoint):
+        if codepoint in self.block_patterns:
+            block_w, block_h, pattern = self.block_patterns[codepoint]
+            y = np.arange(self.cell_height) * block_h // self.cell_height
+            x = np.arange(self.cell_width) * block_w // self.cell_width
+            return pattern[y[:, None] * block_w + x[None, :]]
+        from PIL import ImageDraw, ImageFont
+        font = ImageFont.load_default()
+        glyph = Image.new("L", (12, 16), 0)
+        ImageDraw.Draw(glyph).text((3, 2), chr(codepoint), fill=255, font=font)
+        glyph = glyph.resize((self.cell_width, self.cell_height), Image.BOX)
+        return np.asarray(glyph) > 64
+
+# One shared atlas per cell size
+@functools.lru_cache(maxsize=None)
+def glyph_atlas(cell_width=PREVIEW_CELL_WIDTH, cell_height=PREVIEW_CELL_HEIGHT):
+    return GlyphAtlas(cell_width, cell_height)
+
+# Draw a grid the way OWOT would show it, as a (rows * cell_height, cols * cell_width) uint32 array of
+# 0xFFRRGGBB pixels (QImage.Format_RGB32 / Pillow "BGRX" layout). Empty (masked) cells show the canvas.
+def render_grid(grid, cell_width=PREVIEW_CELL_WIDTH, cell_height=PREVIEW_CELL_HEIGHT):
+    atlas = glyph_atlas(cell_width, cell_height)
+    codepoints, fg, bg = grid.codepoints, grid.fg, grid.bg
+    if grid.clusters:
+        # Clusters are drawn as their first codepoint
+        first = np.array([ord(cluster[0]) for cluster in grid.clusters], dtype=np.uint32)
+        codepoints = np.where(codepoints >= CLUSTER_BASE, first[np.minimum(codepoints - CLUSTER_BASE, len(first) - 1)], codepoints)
+    bg = np.where(bg == NO_COLOR, CANVAS_COLOR, bg)
+    if grid.mask is not None:
+        codepoints = np.where(grid.mask, codepoints, ord(" "))
+        bg = np.where(grid.mask, bg, CANVAS_COLOR)
+    ids = atlas.lookup(codepoints)
+    # (rows, cell_height, cols, cell_width) view of each cell's coverage, blitted straight into the output layout
+    masks = atlas.masks[ids].transpose(0, 2, 1, 3)
+    fg = (fg.astype(np.uint32) | 0xFF000000)[:, None, :, None]
+    bg = (bg.astype(np.uint32) | 0xFF000000)[:, None, :, None]
+    pixels = np.where(masks, fg, bg)
+    return pixels.reshape(grid.rows * cell_height, grid.cols * cell_width)
+
+# Every step-th row and column of the grid, with step chosen so it renders within max_width x max_height
+# pixels (or the whole grid if it already fits). Keeps previews of huge grids cheap to render.
+def preview_grid(grid, max_width, max_height, cell_width=PREVIEW_CELL_WIDTH, cell_height=PREVIEW_CELL_HEIGHT):
+    step = max(1, -(-grid.cols * cell_width // max_width), -(-grid.rows * cell_height // max_height))
+    if step == 1:
+        return grid
+    area = (slice(None, None, step), slice(None, None, step))
+    mask = grid.mask[area] if grid.mask is not None else None
+    return CellGrid(grid.codepoints[area], grid.fg[area], grid.bg[area], mask, grid.x, grid.y, grid.clusters)
+
+def render_image(grid, cell_width=PREVIEW_CELL_WIDTH, cell_height=PREVIEW_CELL_HEIGHT):
+    pixels = render_grid(grid, cell_width, cell_height).astype("<u4")
+    return Image.frombuffer("RGB", (pixels.shape[1], pixels.shape[0]), pixels.tobytes(), "raw", "BGRX", 0, 1)
+
+def save_preview(grid, path, cell_width=PREVIEW_CELL_WIDTH, cell_height=PREVIEW_CELL_HEIGHT):
+    export_grid(grid, path, cell_width, cell_height)
+
+# ==== EXPORTERS ====
+# Every exporter walks the grid a row (or a band of EXPORT_BAND_ROWS rows for PNG) at a time and yields its
+# output piece by piece, so a memory-mapped .ddraw grid of any size exports in constant memory.
+EXPORT_BAND_ROWS = 16
+EXPORT_EXTENSIONS = (".ans", ".html", ".htm", ".png")
+FULL_BLOCK = ord("█")
+
+# values with each one where shown is False replaced by the nearest shown value before it (after it at the start)
+def fill_hidden(values, shown):
+    if shown.all() or not shown.any():
+        return values
+    index = np.maximum.accumulate(np.where(shown, np.arange(len(values)), -1))
+    index[index < 0] = np.flatnonzero(shown)[0]
+    return values[index]
+
+# One row of the grid as runs of cells sharing fg, bg and whether they are written: (text, fg, bg, written).
+# Unwritten cells print as spaces, except the one a wide character to their left already covers, and
+# their colors are ignored so neighbouring unwritten cells always merge. Trailing unwritten cells are dropped.
+# Colors a cell never shows (fg of a space, bg of a full block) take the previous cell's, so block art
+# merges into runs wherever the visible color stays the same.
+def cell_runs(grid, row):
+    codepoints = grid.codepoints[row]
+    written = grid.mask[row] if grid.mask is not None else np.ones(grid.cols, dtype=bool)
+    fg, bg = grid.fg[row], grid.bg[row]
+    if not written.all():
+        first = codepoints
+        if grid.clusters:
+            first = np.array([ord(cluster[0]) for cluster in grid.clusters], dtype=np.uint32)
+            first = np.where(codepoints >= CLUSTER_BASE, first[np.minimum(codepoints - CLUSTER_BASE, len(first) - 1)], codepoints)
+        wide = (codepoint_widths(first) == 2) | ((first >= REGIONAL_INDICATORS[0]) & (first <= REGIONAL_INDICATORS[1]))
+        keep = ~(np.r_[False, wide[:-1] & written[:-1]] & ~written)
+        codepoints, written, fg, bg = codepoints[keep], written[keep], fg[keep], bg[keep]
+        if not written.any():
+            return []
+        end = int(np.flatnonzero(written)[-1]) + 1
+        codepoints, written, fg, bg = codepoints[:end], written[:end], fg[:end], bg[:end]
+        codepoints = np.where(written, codepoints, ord(" "))
+    if len(codepoints) == 0:
+        return []
+    fg = np.where(written, fill_hidden(fg, written & (codepoints != ord(" "))), 0)
+    bg = np.where(written, fill_hidden(bg, written & (codepoints != FULL_BLOCK)), NO_COLOR)
+
+    # Offsets of each cell's text in the row string; clusters take more than one character
+    if grid.clusters and (codepoints >= CLUSTER_BASE).any():
+        pieces = [grid.clusters[c - CLUSTER_BASE] if c >= CLUSTER_BASE else chr(c) for c in codepoints.tolist()]
+        text = "".join(pieces)
+        offsets = np.r_[0, np.cumsum([len(piece) for piece in pieces])]
+    else:
+        text = np.ascontiguousarray(codepoints, dtype="<u4").tobytes().decode("utf-32-le")
+        offsets = np.arange(len(codepoints) + 1)
+    starts = np.flatnonzero(np.r_[True, (fg[1:] != fg[:-1]) | (bg[1:] != bg[:-1]) | (written[1:] != written[:-1])])
+    stops = np.r_[starts[1:], len(codepoints)]
+    return [(text[offsets[start]:offsets[stop]], run_fg, run_bg, run_written)
+            for start, stop, run_fg, run_bg, run_written in zip(starts.tolist(), stops.tolist(), fg[starts].tolist(),
+                                                                bg[starts].tolist(), written[starts].tolist())]
+
+# ANSI truecolor text, one line per row. Only the colors that change between runs are sent; unwritten cells
+# and cells without a background use the terminal's own colors.
+def iter_ansi(grid):
+    for row in range(grid.rows):
+        line = []
+        fg, bg = None, NO_COLOR
+        for text, run_fg, run_bg, written in cell_runs(grid, row):
+            codes = []
+            if not written:
+                if fg is not None or bg != NO_COLOR:
+                    codes.append("0")
+                fg, bg = None, NO_COLOR
+            else:
+                if run_fg != fg:
+                    codes.append(f"38;2;{run_fg >> 16 & 0xFF};{run_fg >> 8 & 0xFF};{run_fg & 0xFF}")
+                if run_bg != bg:
+                    codes.append("49" if run_bg == NO_COLOR else f"48;2;{run_bg >> 16 & 0xFF};{run_bg >> 8 & 0xFF};{run_bg & 0xFF}")
+                fg, bg = run_fg, run_bg
+            if codes:
+                line.append(f"\x1b[{';'.join(codes)}m")
+            line.append(text)
+        if fg is not None or bg != NO_COLOR:
+            line.append("\x1b[0m")
+        line.append("\n")
+        yield "".join(line)
+
+# A self-contained HTML page holding the grid as a <pre>, one <span> per run of written cells.
+# Unwritten cells and cells without a background show the page's canvas color.
+def iter_html(grid, title="DreamDrawer"):
+    yield (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(title)}</title></head>\n'
+           f'<body style="margin:0;background:#{CANVAS_COLOR:06x}">'
+           f'<pre style="margin:0;font:16px/1 monospace;color:#000000">')
+    for row in range(grid.rows):
+        line = []
+        for text, fg, bg, written in cell_runs(grid, row):
+            text = html.escape(text, quote=False)
+            if not written:
+                line.append(text)
+            elif bg == NO_COLOR:
+                line.append(f'<span style="color:#{fg:06x}">{text}</span>')
+            else:
+                line.append(f'<span style="color:#{fg:06x};background:#{bg:06x}">{text}</span>')
+        line.append("\n")
+        yield "".join(line)
+    yield "</pre></body></html>\n"
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+# The offline render as an RGB PNG, rendered and compressed band by band. Scanlines use the Up filter:
+# every cell row repeats its pixel rows, so most filtered bytes are zero.
+def iter_png(grid, cell_width=PREVIEW_CELL_WIDTH, cell_height=PREVIEW_CELL_HEIGHT, band_rows=EXPORT_BAND_ROWS):
+    width, height = grid.cols * cell_width, grid.rows * cell_height
+    if not width or not height:
+        raise ValueError("Cannot export an empty grid as PNG")
+    yield b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+    compressor = zlib.compressobj(6)
+    previous = np.zeros(width * 3, dtype=np.uint8)
+    for top in range(0, grid.rows, band_rows):
+        pixels = render_grid(grid.band(top, top + band_rows), cell_width, cell_height)
+        rgb = np.empty((len(pixels), width, 3), dtype=np.uint8)
+        rgb[..., 0] = pixels >> 16
+        rgb[..., 1] = pixels >> 8
+        rgb[..., 2] = pixels
+        rgb = rgb.reshape(len(pixels), width * 3)
+        scanlines = np.empty((len(rgb), width * 3 + 1), dtype=np.uint8)
+        scanlines[:, 0] = 2
+        scanlines[0, 1:] = rgb[0] - previous
+        scanlines[1:, 1:] = rgb[1:] - rgb[:-1]
+        previous = rgb[-1].copy()
+        data = compressor.compress(scanlines.tobytes())
+        if data:
+            yield png_chunk(b"IDAT", data)
+    yield png_chunk(b"IDAT", compressor.flush()) + png_chunk(b"IEND", b"")
+
+# Write the grid as ANSI (.ans), HTML (.html/.htm) or a rendered PNG (.png), chosen by the extension
+def export_grid(grid, path, cell_width=PREVIEW_CELL_WIDTH, cell_height=PREVIEW_CELL_HEIGHT):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_EXTENSIONS:
+        raise ValueError(f"Unsupported export format: {extension or path}")
+    with timed("export"):
+        if extension == ".png":
+            # The first chunk is made before the file is opened, so an empty grid leaves no file behind
+            chunks = iter_png(grid, cell_width, cell_height)
+            first = next(chunks)
+            with open(path, 'wb') as f:
+                f.write(first)
+                for chunk in chunks:
+                    f.write(chunk)
+            return
+        if extension == ".ans":
+            pieces = iter_ansi(grid)
+        else:
+            pieces = iter_html(grid, os.path.splitext(os.path.basename(path))[0])
+        with open(path, 'w', encoding='utf-8', newline="\n") as f:
+            for piece in pieces:
+                f.write(piece)
+
+# Connection for a mode. args.ws_app, when set, replaces websocket.WebSocketApp (same constructor
+# arguments and run_forever/send/close), e.g. mock_owot.MockWorld.ws_app for offline runs.
+def websocket_app(args, on_open, on_error, on_close):
+    app = getattr(args, 'ws_app', None) or websocket.WebSocketApp
+    return app(args.server_url, on_open=on_open, on_error=on_error, on_close=on_close)
+
+def stop_all_deployments():
+    global deployment_active, current_ws_connections
+    deployment_active = False
+    for ws in current_ws_connections:
+        try:
+            ws.close()
+        except:
+            pass
+    current_ws_connections.clear()
+
+# ==== ASCII SINGLE MODE ====
+def ascii_single_mode(args):
+    global deployment_active, current_ws_connections
+    print("\n=== ASCII Single Mode ===")
+    
+    grid = build_grid(args)
+    if grid is None:
+        return
+
+    grid = grid.offset(args.start_x * SQUARE_WIDTH, args.start_y * SQUARE_HEIGHT)
+
+    deployment_active = True
+    current_ws = None
+
+    def on_open(ws):
+        nonlocal current_ws
+        current_ws = ws
+        current_ws_connections.append(ws)
+        send_grid(ws, grid, args)
+        ws.close()
+        if ws in current_ws_connections:
+            current_ws_connections.remove(ws)
+
+    def on_error(ws, error):
+        pass
+        # print("Error:", error)
+
+    def on_close(ws, code, msg):
+        print("Connection closed.")
+        if ws in current_ws_connections:
+            current_ws_connections.remove(ws)
+
+    ws_app = websocket_app(args, on_open, on_error, on_close)
+
+    if args.proxy_host and args.proxy_port:
+        print(f"Using proxy: {args.proxy_host}:{args.proxy_port}")
+        ws_app.run_forever(
+            http_proxy_host=args.proxy_host,
+            http_proxy_port=args.proxy_port,
+            proxy_type="http"
+        )
+    else:
+        print("Using direct connection (no proxy)")
+        ws_app.run_forever()
+
+# ==== ASCII THREADING MODE ====
+def ascii_threading_mode(args):
+    global deployment_active, current_ws_connections
+    print("\n=== ASCII Threading Mode ===")
+    
+    if not os.path.exists(args.ascii_file):
+        print(f"Error: File not found: {args.ascii_file}")
+        return
+    
+    # Parse proxies from file
+    if not args.proxies:
+        print("No proxies provided for threading mode!")
+        return
+    
+    grid = build_grid(args)
+    if grid is None:
+        return
+    grid = grid.offset(args.start_x * SQUARE_WIDTH, args.start_y * SQUARE_HEIGHT)
+
+    def send_band(proxy, band):
+        if not deployment_active:
+            return
+            
+        current_ws = None
+
+        def on_open(ws):
+            nonlocal current_ws
+            current_ws = ws
+            current_ws_connections.append(ws)
+            send_grid(ws, band, args)
+            ws.close()
+            if ws in current_ws_connections:
+                current_ws_connections.remove(ws)
+
+        def on_error(ws, error):
+            pass
+            # print(f"[{proxy['host']}:{proxy['port']}] Error:", error)
+
+        def on_close(ws, code, msg):
+            print(f"[{proxy['host']}:{proxy['port']}] Connection closed.")
+            if ws in current_ws_connections:
+                current_ws_connections.remove(ws)
+
+        ws_app = websocket_app(args, on_open, on_error, on_close)
+
+        ws_app.run_forever(
+            http_proxy_host=proxy["host"],
+            http_proxy_port=proxy["port"],
+            proxy_type="http"
+        )
+
+    deployment_active = True
+    threads = []
+    for proxy, band in zip(args.proxies, grid.bands(len(args.proxies))):
+        t = threading.Thread(target=send_band, args=(proxy, band))
+        t.daemon = True
+        t.start()
+        threads.append(t)
+    
+    for t in threads:
+        t.join()
+    print("[!] All proxies finished sending.")
+
+# ==== IMAGE SINGLE MODE ====
+def image_single_mode(args):
+    global deployment_active, current_ws_connections
+    
+    print("\n=== Image Single Mode ===")
+    
+    # Convert image (or reuse a cached conversion)
+    grid = build_grid(args)
+    if grid is None:
+        return
+    
+    grid = grid.offset(args.start_x * SQUARE_WIDTH, args.start_y * SQUARE_HEIGHT)
+
+    deployment_active = True
+    current_ws = None
+
+    def on_open(ws):
+        nonlocal current_ws
+        current_ws = ws
+        current_ws_connections.append(ws)
+        send_grid(ws, grid, args)
+        ws.close()
+        if ws in current_ws_connections:
+            current_ws_connections.remove(ws)
+
+    def on_error(ws, error):
+        pass
+        # print("WebSocket error:", error)
+
+    def on_close(ws, code, msg):
+        print("Connection closed.")
+        if ws in current_ws_connections:
+            current_ws_connections.remove(ws)
+
+    ws_app = websocket_app(args, on_open, on_error, on_close)
+
+    if args.proxy_host and args.proxy_port:
+        print(f"Using proxy: {args.proxy_host}:{args.proxy_port}")
+        ws_app.run_forever(
+            http_proxy_host=args.proxy_host,
+            http_proxy_port=args.proxy_port,
+            proxy_type="http"
+        )
+    else:
+        print("Using direct connection (no proxy)")
+        ws_app.run_forever()
+
+# ==== IMAGE THREADING MODE ====
+def image_threading_mode(args):
+    global deployment_active, current_ws_connections
+    
+    print("\n=== Image Threading Mode ===")
+    
+    # Convert image (or reuse a cached conversion)
+    grid = build_grid(args)
+    if grid is None:
+        return
+
+    # Parse proxies from file
+    if not args.proxies:
+        print("No proxies provided for threading mode!")
+        return
+    
+    def send_region(proxy, band):
+        if not deployment_active:
+            return
+
+        current_ws = None
+
+        def on_open(ws):
+            nonlocal current_ws
+            current_ws = ws
+            current_ws_connections.append(ws)
+            send_grid(ws, band, args)
+            ws.close()
+            if ws in current_ws_connections:
+                current_ws_connections.remove(ws)
+
+        def on_error(ws, error):
+            pass
+            # print(f"[{proxy['host']}:{proxy['port']}] WebSocket error:", error)
+
+        def on_close(ws, code, msg):
+            print(f"[{proxy['host']}:{proxy['port']}] Connection closed.")
+            if ws in current_ws_connections:
+                current_ws_connections.remove(ws)
+
+        ws_app = websocket_app(args, on_open, on_error, on_close)
+
+        ws_app.run_forever(
+            http_proxy_host=proxy["host"],
+            http_proxy_port=proxy["port"],
+            proxy_type="http"
+        )
+
+    deployment_active = True
+    grid = grid.offset(args.start_x * SQUARE_WIDTH, args.start_y * SQUARE_HEIGHT)
+    
+    if grid.rows < 40:
+        proxies_to_use = args.proxies[:2]
+    else:
+        proxies_to_use = args.proxies
+        
+    threads = []
+    for proxy, band in zip(proxies_to_use, grid.bands(len(proxies_to_use))):
+        t = threading.Thread(target=send_region, args=(proxy, band))
+        t.daemon = True
+        t.start()
+        threads.append(t)
+    
+    for t in threads:
+        t.join()
+    print("[!] All proxies finished sending.")
@@ -1,37 +1,180 @@
 # 项目数字 22
-import sys, os, threading, websocket, json, time, argparse, builtins
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QGroupBox, QLabel, QLineEdit, QPushButton, QCheckBox, QProgressBar, QTextEdit, QFileDialog, QMessageBox, QFrame, QScrollArea, QGridLayout, QSizePolicy)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize, QMutex, QMutexLocker
-from PyQt5.QtGui import QFont, QPalette, QColor, QTextCursor, QFontDatabase, QPixmap, QIcon
-from PIL import Image
-
-QUADRANT_MAP = {
-    (1, 1, 1, 1): '█', (0, 0, 0, 0): ' ',
-    (1, 0, 0, 0): '▘', (0, 1, 0, 0): '▝',
-    (0, 0, 1, 0): '▖', (0, 0, 0, 1): '▗',
-    (1, 1, 0, 0): '▀', (0, 0, 1, 1): '▄',
-    (1, 0, 1, 0): '▌', (0, 1, 0, 1): '▐',
-    (1, 0, 1, 1): '▙', (0, 1, 1, 1): '▟',
-    (1, 1, 1, 0): '▛', (1, 1, 0, 1): '▜',
-    (1, 0, 0, 1): '▚', (0, 1, 1, 0): '▞'
-}
-SQUARE_WIDTH = 16
-SQUARE_HEIGHT = 8
-
-deployment_active = False
-current_ws_connections = []
-global_log_function = None
-log_mutex = QMutex() # Thread-safe logging
-
-# Custom print function that redirects to GUI log
-def print(*args, **kwargs):
-    message = ' '.join(str(arg) for arg in args)
-    with QMutexLocker(log_mutex):
-        if global_log_function:
-            global_log_function(message)
-        else:
-            # Fallback to regular print if GUI not available
-            builtins.print(message, **kwargs)
+import sys, os, time, queue, multiprocessing
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QGroupBox, QLabel, QLineEdit, QPushButton, QCheckBox, QProgressBar, QTextEdit, QPlainTextEdit, QFileDialog, QMessageBox, QFrame, QScrollArea, QGridLayout, QSizePolicy)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize, QTimer
+from PyQt5.QtGui import QFont, QPalette, QColor, QFontDatabase, QPixmap, QIcon, QImage
+from core import (ALPHA_THRESHOLD, set_log_function, parse_proxy_file, parse_color, build_grid, preview_grid, render_grid, stop_all_deployments,
+                  ascii_single_mode, ascii_threading_mode, image_single_mode, image_threading_mode)
+
+# Log view: lines kept, and how often queued lines are flushed to it (ms)
+LOG_MAX_LINES = 2000
+LOG_FLUSH_MS = 100
+
+# Whole Dreama theme, applied once to the application. Widgets are matched by class
+# (the Dreama* classes included) or by object name instead of carrying their own sheets.
+DREAMA_STYLESHEET = """
+    QLabel {
+        color: #c0c0c0;
+        font-family: 'Segoe UI';
+        font-size: 8pt;
+    }
+    QLabel#subtitle {
+        color: #808080;
+        font-size: 9pt;
+        padding: 1px;
+        background-color: transparent;
+    }
+    QLabel#sectionLabel {
+        font-weight: bold;
+    }
+    QLabel#previewLabel {
+        background-color: #000000;
+        color: #808080;
+    }
+    HeaderImageLabel {
+        background-color: transparent;
+        border: none;
+    }
+    DreamaLineEdit {
+        background-color: #000000;
+        color: #c0c0c0;
+        border: 1px solid #404040;
+        border-radius: 1px;
+        padding: 1px 3px;
+        font-family: 'Segoe UI';
+        font-size: 7pt;
+        selection-background-color: #005712;
+    }
+    DreamaLineEdit:focus {
+        border: 1px solid #005712;
+    }
+    DreamaLineEdit:disabled {
+        background-color: #1a1a1a;
+        color: #666666;
+    }
+    DreamaButton {
+        background-color: #2a2a2a;
+        color: #c0c0c0;
+        border: 1px solid #404040;
+        border-radius: 1px;
+        padding: 2px 6px;
+        font-family: 'Segoe UI';
+        font-size: 9pt;
+        font-weight: normal;
+        min-width: 50px;
+    }
+    DreamaButton:hover {
+        background-color: #3a3a3a;
+        border: 1px solid #505050;
+    }
+    DreamaButton:pressed {
+        background-color: #1a1a1a;
+        border: 1px solid #005712;
+    }
+    DreamaButton:disabled {
+        background-color: #1a1a1a;
+        color: #666666;
+        border: 1px solid #333333;
+    }
+    DreamaButton:focus {
+        border: 1px solid #005712;
+    }
+    DreamaCheckBox {
+        color: #c0c0c0;
+        font-family: 'Segoe UI';
+        font-size: 8pt;
+        spacing: 3px;
+        background-color: transparent;
+    }
+    DreamaCheckBox::indicator {
+        width: 10px;
+        height: 10px;
+        border: 1px solid #404040;
+        border-radius: 1px;
+        background-color: #000000;
+    }
+    DreamaCheckBox::indicator:checked {
+        background-color: #005712;
+        border: 1px solid #005712;
+    }
+    DreamaCheckBox::indicator:hover {
+        border: 1px solid #005712;
+    }
+    DreamaCheckBox::indicator:disabled {
+        background-color: #1a1a1a;
+        border: 1px solid #333333;
+    }
+    DreamaTextEdit {
+        background-color: #000000;
+        color: #c0c0c0;
+        border: 1px solid #404040;
+        border-radius: 1px;
+        font-family: 'Consolas';
+        font-size: 8pt;
+        padding: 2px;
+        selection-background-color: #005712;
+    }
+    LogView {
+        background-color: #000000;
+        color: #c0c0c0;
+    }
+    DreamaProgressBar {
+        border: 1px solid #404040;
+        border-radius: 1px;
+        text-align: center;
+        background-color: #000000;
+        color: #c0c0c0;
+        font-family: 'Segoe UI';
+        font-size: 8pt;
+        height: 16px;
+    }
+    DreamaProgressBar::chunk {
+        background-color: #005712;
+        border-radius: 1px;
+    }
+    QGroupBox {
+        color: #c0c0c0;
+        font-family: 'Segoe UI';
+        font-size: 8pt;
+        font-weight: bold;
+        border: 1px solid #404040;
+        border-radius: 1px;
+        margin-top: 6px;
+        padding-top: 8px;
+        background-color: #0a0a0a;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 5px;
+        padding: 0 3px 0 3px;
+        background-color: #0a0a0a;
+    }
+    QTabWidget::pane {
+        border: 1px solid #404040;
+        background-color: #0a0a0a;
+        top: -1px;
+    }
+    QTabBar::tab {
+        background-color: #1a1a1a;
+        color: #c0c0c0;
+        padding: 4px 8px;
+        border: 1px solid #404040;
+        border-bottom: none;
+        border-top-left-radius: 1px;
+        border-top-right-radius: 1px;
+        font-family: 'Segoe UI';
+        font-size: 7.1pt;
+        margin-right: 1px;
+        min-width: 70px;
+    }
+    QTabBar::tab:selected {
+        background-color: #0a0a0a;
+        border-bottom: 1px solid #0a0a0a;
+    }
+    QTabBar::tab:hover {
+        background-color: #2a2a2a;
+    }
+"""
 
 # Get absolute path to resource
 def resource_path(relative_path):
@@ -42,600 +185,6 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def resize_image(input_path, output_path):
-    try:
-        with Image.open(input_path) as img:
-            original_width, original_height = img.size
-            new_width = int(original_width * 1.20)  # +20% width
-            new_height = int(original_height * 0.70)  # -30% height
-            resized_img = img.resize((new_width, new_height), Image.LANCZOS)
-            resized_img.save(output_path)
-            print(f"[!] New image resize saved to: {output_path}")
-            return True
-    except Exception as e:
-        print(f"[X] Error resizing image: {e}")
-        return False
-
-def prepare_image_for_mode(image_file):
-    if not os.path.exists(image_file):
-        print(f"[X] Image file not found: {image_file}")
-        return None
-    
-    # Check if file already has '_resized' in name
-    base_name = os.path.basename(image_file)
-    if '_resized' in base_name:
-        print(f"[!] Using already resized image: {image_file}")
-        return image_file
-    
-    # Create resized version
-    base, ext = os.path.splitext(image_file)
-    output_image = f"{base}_resized{ext}"
-    
-    if os.path.exists(output_image):
-        print(f"[!] Resized image already exists: {output_image}")
-        return output_image
-    
-    print(f"[!] Resizing image: {image_file}")
-    if resize_image(image_file, output_image):
-        return output_image
-    else:
-        print(f"[!] Using original image without resizing: {image_file}")
-        return image_file
-
-def parse_proxy_file(filename):
-    proxies = []
-    try:
-        with open(filename, 'r') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                
-                # Remove protocol prefix if present
-                if line.startswith('http://'):
-                    line = line[7:]
-                elif line.startswith('socks5://'):
-                    line = line[9:]
-                elif line.startswith('socks4://'):
-                    line = line[9:]
-                
-                parts = line.split(':')
-                
-                if len(parts) >= 2:
-                    host = parts[0].strip()
-                    try:
-                        port = int(parts[1].strip())
-                        proxy = {"host": host, "port": port}
-                        
-                        # Add auth if provided
-                        if len(parts) >= 4:
-                            proxy["auth"] = f"{parts[2].strip()}:{parts[3].strip()}"
-                        
-                        proxies.append(proxy)
-                    except ValueError:
-                        print(f"[X] Invalid port in line {line_num}: {line}")
-                else:
-                    print(f"[X] Invalid format in line {line_num}: {line}")
-                    
-    except FileNotFoundError:
-        print(f"[X] Proxy file not found: {filename}")
-        return []
-    except Exception as e:
-        print(f"[X] Error reading proxy file: {e}")
-        return []
-    
-    print(f"[!] Loaded {len(proxies)} proxies from {filename}")
-    return proxies
-
-def brightness(rgb):
-    r, g, b = rgb
-    return 0.299 * r + 0.587 * g + 0.114 * b
-
-def choose_quadrant(pixels):
-    avg_brightness = sum(brightness(p) for p in pixels) / 4
-    return tuple(1 if brightness(p) < avg_brightness else 0 for p in pixels)
-
-def average_color(pixels):
-    r = sum(p[0] for p in pixels) // len(pixels)
-    g = sum(p[1] for p in pixels) // len(pixels)
-    b = sum(p[2] for p in pixels) // len(pixels)
-    return (r, g, b)
-
-def stop_all_deployments():
-    global deployment_active, current_ws_connections
-    deployment_active = False
-    for ws in current_ws_connections:
-        try:
-            ws.close()
-        except:
-            pass
-    current_ws_connections.clear()
-
-# ==== ASCII SINGLE MODE ====
-def ascii_single_mode(args):
-    global deployment_active, current_ws_connections
-    print("\n=== ASCII Single Mode ===")
-    
-    if not os.path.exists(args.ascii_file):
-        print(f"Error: File not found: {args.ascii_file}")
-        return
-    
-    with open(args.ascii_file, 'r', encoding='utf-8') as f:
-        ascii_lines = [line.rstrip('\n') for line in f]
-
-    all_edits = []
-    word_count = 0
-    for row_index, line in enumerate(ascii_lines):
-        for col_index, char in enumerate(line):
-            x = args.start_x * 16 + col_index
-            y = args.start_y * 8 + row_index
-            block_x = x // 16
-            block_y = y // 8
-            part_x = x % 16
-            part_y = y % 8
-            
-            timestamp = int(time.time())
-            color = int(args.color.lstrip("#"), 16) if args.color else int("#000000".lstrip("#"), 16)
-            bg_color = int(args.bg_color.lstrip("#"), 16) if args.bg_color else None
-            
-            if args.wipe == "on":edit = [block_y, block_x, part_y, part_x, timestamp, " ", word_count, color]
-            else:edit = [block_y, block_x, part_y, part_x, timestamp, char, word_count, color] + ([bg_color] if bg_color is not None else [])
-            all_edits.append(edit)
-            word_count += 1
-
-    deployment_active = True
-    current_ws = None
-
-    def on_open(ws):
-        nonlocal current_ws
-        current_ws = ws
-        current_ws_connections.append(ws)
-        if args.repeat == float('inf'):
-            repetition_count = 0
-            while deployment_active:
-                repetition_count += 1
-                # print(f"[!] Repetition {repetition_count} (infinite mode)")
-                for i in range(0, len(all_edits), args.chunk_size):
-                    if not deployment_active:
-                        break
-                    chunk = all_edits[i:i + args.chunk_size]
-                    payload = {"kind": "write", "edits": chunk}
-                    ws.send(json.dumps(payload))
-                    # print(f"Sent chunk {i // args.chunk_size + 1}")
-                    time.sleep(args.sleep_between)
-                if not deployment_active:
-                    break
-        else:
-            for repeat in range(args.repeat):
-                if not deployment_active:
-                    break
-                # print(f"[!] Repetition {repeat + 1}/{args.repeat}")
-                for i in range(0, len(all_edits), args.chunk_size):
-                    if not deployment_active:
-                        break
-                    chunk = all_edits[i:i + args.chunk_size]
-                    payload = {"kind": "write", "edits": chunk}
-                    ws.send(json.dumps(payload))
-                    # print(f"Sent chunk {i // args.chunk_size + 1}")
-                    time.sleep(args.sleep_between)
-                if not deployment_active:
-                    break
-        ws.close()
-        if ws in current_ws_connections:
-            current_ws_connections.remove(ws)
-
-    def on_error(ws, error):
-        pass
-        # print("Error:", error)
-
-    def on_close(ws, code, msg):
-        print("Connection closed.")
-        if ws in current_ws_connections:
-            current_ws_connections.remove(ws)
-
-    ws_app = websocket.WebSocketApp(
-        args.server_url,
-        on_open=on_open,
-        on_error=on_error,
-        on_close=on_close
-    )
-
-    if args.proxy_host and args.proxy_port:
-        print(f"Using proxy: {args.proxy_host}:{args.proxy_port}")
-        ws_app.run_forever(
-            http_proxy_host=args.proxy_host,
-            http_proxy_port=args.proxy_port,
-            proxy_type="http"
-        )
-    else:
-        print("Using direct connection (no proxy)")
-        ws_app.run_forever()
-
-# ==== ASCII THREADING MODE ====
-def ascii_threading_mode(args):
-    global deployment_active, current_ws_connections
-    print("\n=== ASCII Threading Mode ===")
-    
-    if not os.path.exists(args.ascii_file):
-        print(f"Error: File not found: {args.ascii_file}")
-        return
-    
-    # Parse proxies from file
-    if not args.proxies:
-        print("No proxies provided for threading mode!")
-        return
-    
-    with open(args.ascii_file, 'r', encoding='utf-8') as f:
-        ascii_lines = [line.rstrip('\n') for line in f]
-    total_rows = len(ascii_lines)
-
-    def prepare_edits(lines_subset, offset_rows):
-        edits = []
-        word_count = 0
-        for row_index, line in enumerate(lines_subset):
-            for col_index, char in enumerate(line):
-                x = args.start_x * 16 + col_index
-                y = args.start_y * 8 + (row_index + offset_rows)
-                block_x = x // 16
-                block_y = y // 8
-                part_x = x % 16
-                part_y = y % 8
-                
-                timestamp = int(time.time())
-                color = int(args.color.lstrip("#"), 16) if args.color else int("#000000".lstrip("#"), 16)
-                bg_color = int(args.bg_color.lstrip("#"), 16) if args.bg_color else None
-                
-                if args.wipe == "on":edit = [block_y, block_x, part_y, part_x, timestamp, " ", word_count, color]
-                else:edit = [block_y, block_x, part_y, part_x, timestamp, char, word_count, color] + ([bg_color] if bg_color is not None else [])
-                edits.append(edit)
-                word_count += 1
-        return edits
-
-    def send_edits(proxy, edits):
-        if not deployment_active:
-            return
-            
-        current_ws = None
-
-        def on_open(ws):
-            nonlocal current_ws
-            current_ws = ws
-            current_ws_connections.append(ws)
-            if args.repeat == float('inf'):
-                repetition_count = 0
-                while deployment_active:
-                    repetition_count += 1
-                    # print(f"[{proxy['host']}:{proxy['port']}] [!] Repetition {repetition_count} (infinite mode)")
-                    for i in range(0, len(edits), args.chunk_size):
-                        if not deployment_active:
-                            break
-                        chunk = edits[i:i + args.chunk_size]
-                        payload = {"kind": "write", "edits": chunk}
-                        ws.send(json.dumps(payload))
-                        # print(f"[{proxy['host']}:{proxy['port']}] Sent chunk {i // args.chunk_size + 1}")
-                        time.sleep(args.sleep_between)
-                    if not deployment_active:
-                        break
-            else:
-                for repeat in range(args.repeat):
-                    if not deployment_active:
-                        break
-                    # print(f"[{proxy['host']}:{proxy['port']}] [!] Repetition {repeat + 1}/{args.repeat}")
-                    for i in range(0, len(edits), args.chunk_size):
-                        if not deployment_active:
-                            break
-                        chunk = edits[i:i + args.chunk_size]
-                        payload = {"kind": "write", "edits": chunk}
-                        ws.send(json.dumps(payload))
-                        # print(f"[{proxy['host']}:{proxy['port']}] Sent chunk {i // args.chunk_size + 1}")
-                        time.sleep(args.sleep_between)
-                    if not deployment_active:
-                        break
-            ws.close()
-            if ws in current_ws_connections:
-                current_ws_connections.remove(ws)
-
-        def on_error(ws, error):
-            pass
-            # print(f"[{proxy['host']}:{proxy['port']}] Error:", error)
-
-        def on_close(ws, code, msg):
-            print(f"[{proxy['host']}:{proxy['port']}] Connection closed.")
-            if ws in current_ws_connections:
-                current_ws_connections.remove(ws)
-
-        ws_app = websocket.WebSocketApp(
-            args.server_url,
-            on_open=on_open,
-            on_error=on_error,
-            on_close=on_close
-        )
-
-        ws_app.run_forever(
-            http_proxy_host=proxy["host"],
-            http_proxy_port=proxy["port"],
-            proxy_type="http"
-        )
-
-    deployment_active = True
-    rows_per_proxy = total_rows // len(args.proxies)
-    threads = []
-    for i, proxy in enumerate(args.proxies):
-        start_row = i * rows_per_proxy
-        if i == len(args.proxies) - 1:
-            end_row = total_rows
-        else:
-            end_row = (i + 1) * rows_per_proxy
-        lines_subset = ascii_lines[start_row:end_row]
-        offset_rows = start_row
-        edits = prepare_edits(lines_subset, offset_rows)
-        t = threading.Thread(target=send_edits, args=(proxy, edits))
-        t.daemon = True
-        t.start()
-        threads.append(t)
-    
-    for t in threads:
-        t.join()
-    print("[!] All proxies finished sending.")
-
-# ==== IMAGE SINGLE MODE ====
-def image_single_mode(args):
-    global deployment_active, current_ws_connections
-    
-    print("\n=== Image Single Mode ===")
-    
-    # Prepare image (resize if needed)
-    processed_image = prepare_image_for_mode(args.image_file)
-    if not processed_image:
-        return
-    
-    img = Image.open(processed_image).convert("RGB")
-    width, height = img.size
-    pixels = img.load()
-
-    edits = []
-    word_count = 0
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y]
-            hex_color0 = f"#{r:02x}{g:02x}{b:02x}"
-            hex_color = int(hex_color0.lstrip("#"), 16)
-
-            abs_x = args.start_x * SQUARE_WIDTH + x
-            abs_y = args.start_y * SQUARE_HEIGHT + y
-
-            block_x = abs_x // SQUARE_WIDTH
-            block_y = abs_y // SQUARE_HEIGHT
-            part_x = abs_x % SQUARE_WIDTH
-            part_y = abs_y % SQUARE_HEIGHT
-
-            if args.wipe == "on":edit = [block_y, block_x, part_y, part_x, int(time.time()), " ", word_count, 0]
-            else:edit = [block_y, block_x, part_y, part_x, int(time.time()), " ", word_count, 0, hex_color]
-            edits.append(edit)
-            word_count += 1
-
-    deployment_active = True
-    current_ws = None
-
-    def on_open(ws):
-        nonlocal current_ws
-        current_ws = ws
-        current_ws_connections.append(ws)
-        if args.repeat == float('inf'):
-            repetition_count = 0
-            while deployment_active:
-                repetition_count += 1
-                # print(f"[!] Repetition {repetition_count} (infinite mode)")
-                for i in range(0, len(edits), args.chunk_size):
-                    if not deployment_active:
-                        break
-                    chunk = edits[i:i + args.chunk_size]
-                    payload = {"kind": "write", "edits": chunk}
-                    ws.send(json.dumps(payload))
-                    # print(f"Chunk {i // args.chunk_size + 1} sent.")
-                    time.sleep(args.sleep_between)
-                if not deployment_active:
-                    break
-        else:
-            for repeat in range(args.repeat):
-                if not deployment_active:
-                    break
-                # print(f"[!] Repetition {repeat + 1}/{args.repeat}")
-                for i in range(0, len(edits), args.chunk_size):
-                    if not deployment_active:
-                        break
-                    chunk = edits[i:i + args.chunk_size]
-                    payload = {"kind": "write", "edits": chunk}
-                    ws.send(json.dumps(payload))
-                    # print(f"Chunk {i // args.chunk_size + 1} sent.")
-                    time.sleep(args.sleep_between)
-                if not deployment_active:
-                    break
-        ws.close()
-        if ws in current_ws_connections:
-            current_ws_connections.remove(ws)
-
-    def on_error(ws, error):
-        pass
-        # print("WebSocket error:", error)
-
-    def on_close(ws, code, msg):
-        print("Connection closed.")
-        if ws in current_ws_connections:
-            current_ws_connections.remove(ws)
-
-    ws_app = websocket.WebSocketApp(
-        args.server_url,
-        on_open=on_open,
-        on_error=on_error,
-        on_close=on_close
-    )
-
-    if args.proxy_host and args.proxy_port:
-        print(f"Using proxy: {args.proxy_host}:{args.proxy_port}")
-        ws_app.run_forever(
-            http_proxy_host=args.proxy_host,
-            http_proxy_port=args.proxy_port,
-            proxy_type="http"
-        )
-    else:
-        print("Using direct connection (no proxy)")
-        ws_app.run_forever()
-
-# ==== IMAGE THREADING MODE ====
-def image_threading_mode(args):
-    global deployment_active, current_ws_connections
-    
-    print("\n=== Image Threading Mode ===")
-    
-    # Prepare image (resize if needed)
-    processed_image = prepare_image_for_mode(args.image_file)
-    if not processed_image:
-        return
-
-    # Parse proxies from file
-    if not args.proxies:
-        print("No proxies provided for threading mode!")
-        return
-    
-    def send_region(proxy, img_part, offset_y_tiles):
-        if not deployment_active:
-            return
-            
-        pixels = img_part.load()
-        edits = []
-        word_count = 0
-        width, height = img_part.size
-
-        for y in range(0, height, 2):
-            for x in range(0, width, 2):
-                try:
-                    p1 = pixels[x, y]
-                    p2 = pixels[x + 1, y]
-                    p3 = pixels[x, y + 1]
-                    p4 = pixels[x + 1, y + 1]
-
-                    block = [p1, p2, p3, p4]
-                    quadrant = choose_quadrant(block)
-                    character = QUADRANT_MAP.get(quadrant, '█')
-
-                    dark_pixels = [block[i] for i in range(4) if quadrant[i] == 1]
-                    light_pixels = [block[i] for i in range(4) if quadrant[i] == 0]
-
-                    if not dark_pixels: dark_pixels = block
-                    if not light_pixels: light_pixels = block
-
-                    character_color = average_color(dark_pixels)
-                    background_color = average_color(light_pixels)
-
-                    hex_char_color = int(f"{character_color[0]:02x}{character_color[1]:02x}{character_color[2]:02x}", 16)
-                    hex_bg_color = int(f"{background_color[0]:02x}{background_color[1]:02x}{background_color[2]:02x}", 16)
-
-                    abs_x = args.start_x * SQUARE_WIDTH + (x // 2)
-                    abs_y = args.start_y * SQUARE_HEIGHT + offset_y_tiles + (y // 2)
-
-                    block_x = abs_x // SQUARE_WIDTH
-                    block_y = abs_y // SQUARE_HEIGHT
-                    part_x = abs_x % SQUARE_WIDTH
-                    part_y = abs_y % SQUARE_HEIGHT
-
-                    if args.wipe == "on":edits.append([block_y, block_x, part_y, part_x, int(time.time()), " ", word_count, 0])
-                    else:edits.append([block_y, block_x, part_y, part_x, int(time.time()), character, word_count, hex_char_color, hex_bg_color])
-                    word_count += 1
-                except IndexError:
-                    continue
-
-        current_ws = None
-
-        def on_open(ws):
-            nonlocal current_ws
-            current_ws = ws
-            current_ws_connections.append(ws)
-            if args.repeat == float('inf'):
-                repetition_count = 0
-                while deployment_active:
-                    repetition_count += 1
-                    # print(f"[{proxy['host']}:{proxy['port']}] [!] Repetition {repetition_count} (infinite mode)")
-                    for i in range(0, len(edits), args.chunk_size):
-                        if not deployment_active:
-                            break
-                        chunk = edits[i:i + args.chunk_size]
-                        payload = {"kind": "write", "edits": chunk}
-                        ws.send(json.dumps(payload))
-                        # print(f"[{proxy['host']}:{proxy['port']}] Sent chunk {i // args.chunk_size + 1}")
-                        time.sleep(args.sleep_between)
-                    if not deployment_active:
-                        break
-            else:
-                for repeat in range(args.repeat):
-                    if not deployment_active:
-                        break
-                    # print(f"[{proxy['host']}:{proxy['port']}] [!] Repetition {repeat + 1}/{args.repeat}")
-                    for i in range(0, len(edits), args.chunk_size):
-                        if not deployment_active:
-                            break
-                        chunk = edits[i:i + args.chunk_size]
-                        payload = {"kind": "write", "edits": chunk}
-                        ws.send(json.dumps(payload))
-                        # print(f"[{proxy['host']}:{proxy['port']}] Sent chunk {i // args.chunk_size + 1}")
-                        time.sleep(args.sleep_between)
-                    if not deployment_active:
-                        break
-            ws.close()
-            if ws in current_ws_connections:
-                current_ws_connections.remove(ws)
-
-        def on_error(ws, error):
-            pass
-            # print(f"[{proxy['host']}:{proxy['port']}] WebSocket error:", error)
-
-        def on_close(ws, code, msg):
-            print(f"[{proxy['host']}:{proxy['port']}] Connection closed.")
-            if ws in current_ws_connections:
-                current_ws_connections.remove(ws)
-
-        ws_app = websocket.WebSocketApp(
-            args.server_url,
-            on_open=on_open,
-            on_error=on_error,
-            on_close=on_close
-        )
-
-        ws_app.run_forever(
-            http_proxy_host=proxy["host"],
-            http_proxy_port=proxy["port"],
-            proxy_type="http"
-        )
-
-    deployment_active = True
-    img = Image.open(processed_image).convert("RGB")
-    width, height = img.size
-    
-    if width % 2 != 0: width -= 1
-    if height % 2 != 0: height -= 1
-    img = img.crop((0, 0, width, height))
-    
-    if height < 80:
-        proxies_to_use = args.proxies[:2]
-    else:
-        proxies_to_use = args.proxies
-        
-    part_height = height // len(proxies_to_use)
-    threads = []
-    for i, proxy in enumerate(proxies_to_use):
-        y_start = i * part_height
-        y_end = (i + 1) * part_height if i < len(proxies_to_use) - 1 else height
-        if (y_end - y_start) % 2 != 0: y_end -= 1
-        img_part = img.crop((0, y_start, width, y_end))
-        offset_y_tiles = (y_start) // 2
-        t = threading.Thread(target=send_region, args=(proxy, img_part, offset_y_tiles))
-        t.daemon = True
-        t.start()
-        threads.append(t)
-    
-    for t in threads:
-        t.join()
-    print("[!] All proxies finished sending.")
 
 class DeploymentThread(QThread):
     log_signal = pyqtSignal(str)
@@ -657,11 +206,14 @@ class DeploymentThread(QThread):
             self.log_signal.emit(f"[INFO] Chunk size: {self.args.chunk_size}")
             self.log_signal.emit(f"[INFO] Sleep: {self.args.sleep_between}s")
             self.log_signal.emit(f"[INFO] Wipe mode: {self.args.wipe}")
+            if hasattr(self.args, 'encoder'):
+                self.log_signal.emit(f"[INFO] Encoder: {self.args.encoder}")
             if hasattr(self.args, 'color') and self.args.color:
                 self.log_signal.emit(f"[INFO] Color: {self.args.color}")
             if hasattr(self.args, 'bg_color') and self.args.bg_color:
                 self.log_signal.emit(f"[INFO] Background Color: {self.args.bg_color}")
             self.log_signal.emit("-" * 50)
+            self.args.progress = self.report_progress
             
             if self.args.mode == 'ascii_single':ascii_single_mode(self.args)
             elif self.args.mode == 'ascii_threading':ascii_threading_mode(self.args)
@@ -675,35 +227,46 @@ class DeploymentThread(QThread):
             self.log_signal.emit(f"[ERROR] Task failed: {str(e)}")
             self.finished_signal.emit(False)
             
+    # Conversion progress as a percentage of cell rows done; 100 means sending has started
+    def report_progress(self, done, total):
+        self.progress_signal.emit(done * 100 // max(total, 1))
+
     def stop(self):
         self.is_running = False
         stop_all_deployments()
 
+class PreviewThread(QThread):
+    preview_ready = pyqtSignal(QImage, str)
+    
+    def __init__(self, args, label_size):
+        super().__init__()
+        self.args = args
+        self.label_size = label_size
+        
+    def run(self):
+        try:
+            grid = build_grid(self.args)
+            if grid is None:
+                self.preview_ready.emit(QImage(), "No preview")
+                return
+            if self.args.wipe == "on":
+                grid = grid.wiped()
+            start = time.perf_counter()
+            # Rendered at about the label's size; the full grid at 4x6 px per cell can take gigabytes
+            pixels = render_grid(preview_grid(grid, self.label_size.width(), self.label_size.height()))
+            height, width = pixels.shape
+            image = QImage(pixels.data, width, height, width * 4, QImage.Format_RGB32).copy()
+            elapsed = (time.perf_counter() - start) * 1000
+            self.preview_ready.emit(image, f"{grid.cols}x{grid.rows} cells, {len(grid)} edits ({elapsed:.0f} ms)")
+        except Exception as e:
+            self.preview_ready.emit(QImage(), f"Preview failed: {e}")
+
 class DreamaLineEdit(QLineEdit):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setMinimumHeight(20)
         self.setMaximumHeight(20)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        self.setStyleSheet("""
-            QLineEdit {
-                background-color: #000000;
-                color: #c0c0c0;
-                border: 1px solid #404040;
-                border-radius: 1px;
-                padding: 1px 3px;
-                font-family: 'Segoe UI';
-                font-size: 7pt;
-                selection-background-color: #005712;
-            }
-            QLineEdit:focus {
-                border: 1px solid #005712;
-            }
-            QLineEdit:disabled {
-                background-color: #1a1a1a;
-                color: #666666;
-            }
-        """)
 
 class DreamaButton(QPushButton):
     def __init__(self, text, *args, **kwargs):
@@ -711,104 +274,20 @@ class DreamaButton(QPushButton):
         self.setMinimumHeight(20)
         self.setMaximumHeight(20)
         self.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Fixed)
-        self.setStyleSheet("""
-            QPushButton {
-                background-color: #2a2a2a;
-                color: #c0c0c0;
-                border: 1px solid #404040;
-                border-radius: 1px;
-                padding: 2px 6px;
-                font-family: 'Segoe UI';
-                font-size: 9pt;
-                font-weight: normal;
-                min-width: 50px;
-            }
-            QPushButton:hover {
-                background-color: #3a3a3a;
-                border: 1px solid #505050;
-            }
-            QPushButton:pressed {
-                background-color: #1a1a1a;
-                border: 1px solid #005712;
-            }
-            QPushButton:disabled {
-                background-color: #1a1a1a;
-                color: #666666;
-                border: 1px solid #333333;
-            }
-            QPushButton:focus {
-                border: 1px solid #005712;
-            }
-        """)
 
 class DreamaCheckBox(QCheckBox):
     def __init__(self, text, *args, **kwargs):
         super().__init__(text, *args, **kwargs)
         self.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Fixed)
-        self.setStyleSheet("""
-            QCheckBox {
-                color: #c0c0c0;
-                font-family: 'Segoe UI';
-                font-size: 8pt;
-                spacing: 3px;
-                background-color: transparent;
-            }
-            QCheckBox::indicator {
-                width: 10px;
-                height: 10px;
-                border: 1px solid #404040;
-                border-radius: 1px;
-                background-color: #000000;
-            }
-            QCheckBox::indicator:checked {
-                background-color: #005712;
-                border: 1px solid #005712;
-            }
-            QCheckBox::indicator:hover {
-                border: 1px solid #005712;
-            }
-            QCheckBox::indicator:disabled {
-                background-color: #1a1a1a;
-                border: 1px solid #333333;
-            }
-        """)
 
 class DreamaTextEdit(QTextEdit):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.setStyleSheet("""
-            QTextEdit {
-                background-color: #000000;
-                color: #c0c0c0;
-                border: 1px solid #404040;
-                border-radius: 1px;
-                font-family: 'Consolas';
-                font-size: 8pt;
-                padding: 2px;
-                selection-background-color: #005712;
-            }
-        """)
 
 class DreamaProgressBar(QProgressBar):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.setStyleSheet("""
-            QProgressBar {
-                border: 1px solid #404040;
-                border-radius: 1px;
-                text-align: center;
-                background-color: #000000;
-                color: #c0c0c0;
-                font-family: 'Segoe UI';
-                font-size: 8pt;
-                height: 16px;
-            }
-            QProgressBar::chunk {
-                background-color: #005712;
-                border-radius: 1px;
-            }
-        """)
 
 class CompactTabWidget(QWidget):
     def __init__(self, parent=None):
@@ -819,25 +298,6 @@ class CompactTabWidget(QWidget):
         
     def add_group(self, title, widget):
         group = QGroupBox(title)
-        group.setStyleSheet("""
-            QGroupBox {
-                color: #c0c0c0;
-                font-family: 'Segoe UI';
-                font-size: 8pt;
-                font-weight: bold;
-                border: 1px solid #404040;
-                border-radius: 1px;
-                margin-top: 6px;
-                padding-top: 8px;
-                background-color: #0a0a0a;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 5px;
-                padding: 0 3px 0 3px;
-                background-color: #0a0a0a;
-            }
-        """)
         group_layout = QVBoxLayout(group)
         group_layout.setContentsMargins(5, 8, 5, 5)
         group_layout.setSpacing(3)
@@ -851,12 +311,6 @@ class HeaderImageLabel(QLabel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setAlignment(Qt.AlignCenter)
-        self.setStyleSheet("""
-            QLabel {
-                background-color: transparent;
-                border: none;
-            }
-        """)
         
     def set_header_image(self, image_path):
         pixmap = QPixmap(image_path)
@@ -866,27 +320,46 @@ class HeaderImageLabel(QLabel):
         self.setFixedSize(490, 80)
         return True
 
-class ThreadSafeTextEdit(QTextEdit):
-    def __init__(self, *args, **kwargs):
+# Log view fed from any thread: post() only queues the line, a timer on the GUI thread
+# appends everything queued since the last flush in one go. Old lines drop off past max_lines.
+class LogView(QPlainTextEdit):
+    def __init__(self, max_lines=LOG_MAX_LINES, flush_interval=LOG_FLUSH_MS, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._mutex = QMutex()
-        
-    def safe_append(self, text):
-        with QMutexLocker(self._mutex):
-            self.append(text)
-            # Auto-scroll to bottom
-            cursor = self.textCursor()
-            cursor.movePosition(QTextCursor.End)
-            self.setTextCursor(cursor)
-            self.ensureCursorVisible()
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(max_lines)
+        self.pending = queue.SimpleQueue()
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start(flush_interval)
+        
+    def post(self, text):
+        self.pending.put(text)
+        
+    def flush(self):
+        lines = []
+        try:
+            while True:
+                lines.append(self.pending.get_nowait())
+        except queue.Empty:
+            pass
+        if not lines:
+            return
+        # Lines that would be trimmed right away are never laid out
+        lines = lines[-self.maximumBlockCount():]
+        scrollbar = self.verticalScrollBar()
+        follow = scrollbar.value() == scrollbar.maximum()
+        self.appendPlainText("\n".join(lines))
+        # Auto-scroll to bottom unless the user scrolled up
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
 
 class PixelArtGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.deployment_thread = None
         self.server_url = "wss://ourworldoftext.com/ws/"
-        global global_log_function
-        global_log_function = self.log_message
+        set_log_function(self.log_message)
         
         # Separate variables for each tab - FIXED: Added proper storage for all input fields
         self.ascii_file_edit = None
@@ -928,37 +401,65 @@ class PixelArtGUI(QMainWindow):
         self.chunk_edit_image_threading = None
         self.sleep_edit_image_threading = None
         
+        # Alpha threshold for image modes
+        self.alpha_edit_image_single = None
+        self.alpha_edit_image_threading = None
+        
         # FIXED: Added proxy host/port for single modes
         self.host_edit_ascii_single = None
         self.port_edit_ascii_single = None
         self.host_edit_image_single = None
         self.port_edit_image_single = None
         
+        # Block encoder options for image threading mode
+        self.bestfit_checkbox_image_threading = None
+        self.sextant_checkbox_image_threading = None
+        self.linear_checkbox_image_threading = None
+        
+        # Live preview state
+        self.preview_thread = None
+        self.preview_pending = False
+        
         # NEW: Added color input fields for ASCII modes
         self.color_edit_ascii_single = None
         self.bg_color_edit_ascii_single = None
         self.color_edit_ascii_threading = None
         self.bg_color_edit_ascii_threading = None
+        self.markup_checkbox_ascii_single = None
+        self.markup_checkbox_ascii_threading = None
         
         self.init_ui()
         
     def init_ui(self):
         self.setWindowTitle("DreamDrawer - Another Owot Drawing Tool")
         self.setWindowIcon(QIcon(resource_path("favicon.ico")))
-        # Fixed window size 506x622 - blocked from resizing
-        self.setFixedSize(506, 622)
+        # Fixed window size 816x622 (controls + preview) - blocked from resizing
+        self.setFixedSize(816, 622)
         
         # Set authentic Dreama theme
         self.set_Dreama_theme()
         
+        # Preview re-renders 300 ms after the last settings change
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(300)
+        self.preview_timer.timeout.connect(self.start_preview)
+        
         # Central widget
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
+        outer_layout = QHBoxLayout(central_widget)
+        outer_layout.setContentsMargins(0, 0, 0, 0)
+        outer_layout.setSpacing(0)
         
         # Main layout
-        main_layout = QVBoxLayout(central_widget)
+        controls_widget = QWidget()
+        controls_widget.setFixedWidth(506)
+        main_layout = QVBoxLayout(controls_widget)
         main_layout.setContentsMargins(6, 6, 6, 6)
         main_layout.setSpacing(4)
+        outer_layout.addWidget(controls_widget)
+        outer_layout.addWidget(self.create_preview_panel())
 
         # Custom PNG Header Image
         self.header_label = HeaderImageLabel()
@@ -970,61 +471,27 @@ class PixelArtGUI(QMainWindow):
         if header_loaded:
             subtitle = QLabel("DreamDrawer v1.1")
             subtitle.setAlignment(Qt.AlignCenter)
-            subtitle.setStyleSheet("""
-                QLabel {
-                    color: #808080;
-                    font-family: 'Segoe UI';
-                    font-size: 9pt;
-                    padding: 1px;
-                    background-color: transparent;
-                }
-            """)
+            subtitle.setObjectName("subtitle")
             subtitle.setMinimumHeight(18)
             subtitle.setMaximumHeight(18)
             main_layout.addWidget(subtitle)
         
         # Create compact tabs
         self.tabs = QTabWidget()
-        self.tabs.setStyleSheet("""
-            QTabWidget::pane {
-                border: 1px solid #404040;
-                background-color: #0a0a0a;
-                top: -1px;
-            }
-            QTabBar::tab {
-                background-color: #1a1a1a;
-                color: #c0c0c0;
-                padding: 4px 8px;
-                border: 1px solid #404040;
-                border-bottom: none;
-                border-top-left-radius: 1px;
-                border-top-right-radius: 1px;
-                font-family: 'Segoe UI';
-                font-size: 7.1pt;
-                margin-right: 1px;
-                min-width: 70px;
-            }
-            QTabBar::tab:selected {
-                background-color: #0a0a0a;
-                border-bottom: 1px solid #0a0a0a;
-            }
-            QTabBar::tab:hover {
-                background-color: #2a2a2a;
-            }
-        """)
         self.tabs.setMinimumHeight(320)
         self.tabs.setMaximumHeight(320)
         
-        # Create compact tabs
-        self.ascii_single_tab = self.create_ascii_single_tab()
-        self.ascii_threading_tab = self.create_ascii_threading_tab()
-        self.image_single_tab = self.create_image_single_tab()
-        self.image_threading_tab = self.create_image_threading_tab()
-        
-        self.tabs.addTab(self.ascii_single_tab, "ASCII Single")
-        self.tabs.addTab(self.ascii_threading_tab, "ASCII Threading")
-        self.tabs.addTab(self.image_single_tab, "Image Single")
-        self.tabs.addTab(self.image_threading_tab, "Image Threading")
+        # Create compact tabs; each tab's contents are built the first time it is selected
+        self.tab_builders = [self.create_ascii_single_tab, self.create_ascii_threading_tab,
+                             self.create_image_single_tab, self.create_image_threading_tab]
+        for title in ["ASCII Single", "ASCII Threading", "Image Single", "Image Threading"]:
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(page, title)
+        self.build_tab(0)
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.tabs.currentChanged.connect(self.schedule_preview)
         
         main_layout.addWidget(self.tabs)
         
@@ -1057,12 +524,12 @@ class PixelArtGUI(QMainWindow):
         
         # Log section
         log_label = QLabel("Progress Log:")
-        log_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt; font-weight: bold;")
+        log_label.setObjectName("sectionLabel")
         log_label.setMinimumHeight(18)
         log_label.setMaximumHeight(18)
         main_layout.addWidget(log_label)
         
-        self.log_text = ThreadSafeTextEdit() # thread-safe text edit
+        self.log_text = LogView() # batched, bounded log view
         self.log_text.setMinimumHeight(100)
         self.log_text.setMaximumHeight(100)
         main_layout.addWidget(self.log_text)
@@ -1083,6 +550,34 @@ class PixelArtGUI(QMainWindow):
         dark_palette.setColor(QPalette.Highlight, QColor(0, 85, 255))
         dark_palette.setColor(QPalette.HighlightedText, Qt.black)
         self.setPalette(dark_palette)
+        QApplication.instance().setStyleSheet(DREAMA_STYLESHEET)
+        
+    def build_tab(self, index):
+        builder = self.tab_builders[index]
+        if builder is None:
+            return
+        self.tab_builders[index] = None
+        self.tabs.widget(index).layout().addWidget(builder())
+        
+    def create_preview_panel(self):
+        panel = CompactTabWidget()
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(3)
+        
+        self.preview_label = QLabel("No preview")
+        self.preview_label.setAlignment(Qt.AlignCenter)
+        self.preview_label.setFixedSize(282, 540)
+        self.preview_label.setObjectName("previewLabel")
+        
+        self.preview_info = QLabel("")
+        
+        layout.addWidget(self.preview_label)
+        layout.addWidget(self.preview_info)
+        panel.add_group("Preview", widget)
+        panel.layout.addStretch()
+        return panel
         
     def create_ascii_single_tab(self):
         tab = CompactTabWidget()
@@ -1152,6 +647,9 @@ class PixelArtGUI(QMainWindow):
         # Settings
         settings_widget = self.create_settings_widget("image_threading")
         tab.add_group("Settings", settings_widget)
+        # Encoder
+        encoder_widget = self.create_encoder_widget()
+        tab.add_group("Encoder", encoder_widget)
         return tab
         
     def create_file_widget(self, file_type, browse_callback):
@@ -1161,6 +659,7 @@ class PixelArtGUI(QMainWindow):
         layout.setSpacing(3)
         file_edit = DreamaLineEdit()
         file_edit.setPlaceholderText(f"Select {file_type} file...")
+        file_edit.textChanged.connect(self.schedule_preview)
         
         # Store reference based on callback type
         if browse_callback == self.browse_ascii_single_file:
@@ -1213,7 +712,6 @@ class PixelArtGUI(QMainWindow):
         
         # Start X
         x_label = QLabel("Start X:")
-        x_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         x_edit = DreamaLineEdit()
         x_edit.setText("0")
@@ -1221,7 +719,6 @@ class PixelArtGUI(QMainWindow):
         
         # Start Y
         y_label = QLabel("Start Y:")
-        y_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         y_edit = DreamaLineEdit()
         y_edit.setText("0")
@@ -1256,6 +753,7 @@ class PixelArtGUI(QMainWindow):
         
         # Create separate wipe checkbox for each tab
         wipe_checkbox = DreamaCheckBox("Wipe Mode")
+        wipe_checkbox.toggled.connect(self.schedule_preview)
         
         # Store reference based on tab type
         if tab_type == "ascii_single":
@@ -1269,7 +767,6 @@ class PixelArtGUI(QMainWindow):
         
         # Repeat
         repeat_label = QLabel("Repeat:")
-        repeat_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         repeat_edit = DreamaLineEdit()
         repeat_edit.setText("1")
@@ -1277,7 +774,6 @@ class PixelArtGUI(QMainWindow):
         
         # Chunk Size
         chunk_label = QLabel("Chunk:")
-        chunk_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         chunk_edit = DreamaLineEdit()
         chunk_edit.setText("80")
@@ -1285,7 +781,6 @@ class PixelArtGUI(QMainWindow):
         
         # Sleep
         sleep_label = QLabel("Sleep:")
-        sleep_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         sleep_edit = DreamaLineEdit()
         sleep_edit.setText("0.17")
@@ -1317,6 +812,23 @@ class PixelArtGUI(QMainWindow):
         layout.addWidget(sleep_label, 0, 6)
         layout.addWidget(sleep_edit, 0, 7)
         
+        # Alpha threshold (image modes): cells more transparent than this are skipped
+        if tab_type in ("image_single", "image_threading"):
+            alpha_label = QLabel("Alpha:")
+            
+            alpha_edit = DreamaLineEdit()
+            alpha_edit.setText(str(ALPHA_THRESHOLD))
+            alpha_edit.setMaximumWidth(35)
+            alpha_edit.textChanged.connect(self.schedule_preview)
+            
+            if tab_type == "image_single":
+                self.alpha_edit_image_single = alpha_edit
+            else:
+                self.alpha_edit_image_threading = alpha_edit
+            
+            layout.addWidget(alpha_label, 0, 8)
+            layout.addWidget(alpha_edit, 0, 9)
+        
         return widget
 
     def create_color_widget(self, tab_type):
@@ -1327,31 +839,62 @@ class PixelArtGUI(QMainWindow):
         layout.setSpacing(3)
         
         color_label = QLabel("Color:")
-        color_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         color_edit = DreamaLineEdit()
         color_edit.setMaximumWidth(70)
         color_edit.setPlaceholderText("#000000")
+        color_edit.textChanged.connect(self.schedule_preview)
         
         bg_color_label = QLabel("BG Color:")
-        bg_color_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         bg_color_edit = DreamaLineEdit()
         bg_color_edit.setMaximumWidth(70)
         bg_color_edit.setPlaceholderText("#f70004")
+        bg_color_edit.textChanged.connect(self.schedule_preview)
+        
+        # Markup: {#rrggbb}, {#rrggbb/#rrggbb}, {/#rrggbb} and {/} tags in the file change colors inline
+        markup_checkbox = DreamaCheckBox("Markup")
+        markup_checkbox.setToolTip("{#rrggbb} text color, {#rrggbb/#rrggbb} text and background, {/#rrggbb} background, {/} reset, {{ literal {")
+        markup_checkbox.toggled.connect(self.schedule_preview)
         
         # Store references based on tab type
         if tab_type == "ascii_single":
             self.color_edit_ascii_single = color_edit
             self.bg_color_edit_ascii_single = bg_color_edit
+            self.markup_checkbox_ascii_single = markup_checkbox
         elif tab_type == "ascii_threading":
             self.color_edit_ascii_threading = color_edit
             self.bg_color_edit_ascii_threading = bg_color_edit
+            self.markup_checkbox_ascii_threading = markup_checkbox
         
         layout.addWidget(color_label, 0, 0)
         layout.addWidget(color_edit, 0, 1)
         layout.addWidget(bg_color_label, 0, 2)
         layout.addWidget(bg_color_edit, 0, 3)
+        layout.addWidget(markup_checkbox, 0, 4)
+        
+        return widget
+        
+    def create_encoder_widget(self):
+        """Create block encoder options for the image threading tab"""
+        widget = QWidget()
+        layout = QHBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(3)
+        
+        # Best fit: try every block pattern instead of splitting on mean brightness
+        self.bestfit_checkbox_image_threading = DreamaCheckBox("Best Fit")
+        # Sextants: 2x3 legacy computing block characters instead of 2x2 quadrants
+        self.sextant_checkbox_image_threading = DreamaCheckBox("Sextants")
+        # Linear: resample and average cell colors in linear light instead of on sRGB values
+        self.linear_checkbox_image_threading = DreamaCheckBox("Linear")
+        self.linear_checkbox_image_threading.setToolTip("Gamma-correct resampling and color averaging")
+        
+        for checkbox in (self.bestfit_checkbox_image_threading, self.sextant_checkbox_image_threading,
+                         self.linear_checkbox_image_threading):
+            checkbox.toggled.connect(self.schedule_preview)
+            layout.addWidget(checkbox)
+        layout.addStretch()
         
         return widget
         
@@ -1362,14 +905,12 @@ class PixelArtGUI(QMainWindow):
         layout.setSpacing(3)
         
         host_label = QLabel("Host:")
-        host_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         host_edit = DreamaLineEdit()
         host_edit.setPlaceholderText("host")
         host_edit.setMaximumWidth(70)
         
         port_label = QLabel("Port:")
-        port_label.setStyleSheet("color: #c0c0c0; font-family: 'Segoe UI'; font-size: 8pt;")
         
         port_edit = DreamaLineEdit()
         port_edit.setPlaceholderText("port")
@@ -1392,14 +933,14 @@ class PixelArtGUI(QMainWindow):
         
     def browse_ascii_single_file(self):
         filename, _ = QFileDialog.getOpenFileName(
-            self, "Select ASCII File", "", "Text Files (*.txt);;All Files (*)"
+            self, "Select ASCII File", "", "Text Files (*.txt);;DreamDrawer Files (*.ddraw);;All Files (*)"
         )
         if filename and self.ascii_file_edit:
             self.ascii_file_edit.setText(filename)
             
     def browse_ascii_threading_file(self):
         filename, _ = QFileDialog.getOpenFileName(
-            self, "Select ASCII File", "", "Text Files (*.txt);;All Files (*)"
+            self, "Select ASCII File", "", "Text Files (*.txt);;DreamDrawer Files (*.ddraw);;All Files (*)"
         )
         if filename and self.ascii_threading_file_edit:
             self.ascii_threading_file_edit.setText(filename)
@@ -1407,7 +948,7 @@ class PixelArtGUI(QMainWindow):
     def browse_image_single_file(self):
         filename, _ = QFileDialog.getOpenFileName(
             self, "Select Image File", "", 
-            "Image Files (*.jpg *.jpeg *.png);;All Files (*)"
+            "Image Files (*.jpg *.jpeg *.png);;DreamDrawer Files (*.ddraw);;All Files (*)"
         )
         if filename and self.image_file_edit:
             self.image_file_edit.setText(filename)
@@ -1415,7 +956,7 @@ class PixelArtGUI(QMainWindow):
     def browse_image_threading_file(self):
         filename, _ = QFileDialog.getOpenFileName(
             self, "Select Image File", "", 
-            "Image Files (*.jpg *.jpeg *.png);;All Files (*)"
+            "Image Files (*.jpg *.jpeg *.png);;DreamDrawer Files (*.ddraw);;All Files (*)"
         )
         if filename and self.image_threading_file_edit:
             self.image_threading_file_edit.setText(filename)
@@ -1430,12 +971,92 @@ class PixelArtGUI(QMainWindow):
             elif tab_type == "image_threading" and self.proxy_file_edit_image_threading:
                 self.proxy_file_edit_image_threading.setText(filename)
             
+    def schedule_preview(self, *_):
+        self.preview_timer.start()
+        
+    def preview_args(self):
+        """Collect the current tab's file, wipe and color settings for the preview"""
+        modes = ["ascii_single", "ascii_threading", "image_single", "image_threading"]
+        mode = modes[self.tabs.currentIndex()]
+        
+        class Args:
+            pass
+        args = Args()
+        args.mode = mode
+        if mode == "ascii_single":
+            args.ascii_file = self.ascii_file_edit.text()
+            args.wipe = "on" if self.wipe_checkbox_ascii_single.isChecked() else "off"
+            args.color = self.color_edit_ascii_single.text()
+            args.bg_color = self.bg_color_edit_ascii_single.text()
+            args.markup = self.markup_checkbox_ascii_single.isChecked()
+        elif mode == "ascii_threading":
+            args.ascii_file = self.ascii_threading_file_edit.text()
+            args.wipe = "on" if self.wipe_checkbox_ascii_threading.isChecked() else "off"
+            args.color = self.color_edit_ascii_threading.text()
+            args.bg_color = self.bg_color_edit_ascii_threading.text()
+            args.markup = self.markup_checkbox_ascii_threading.isChecked()
+        elif mode == "image_single":
+            args.image_file = self.image_file_edit.text()
+            args.wipe = "on" if self.wipe_checkbox_image_single.isChecked() else "off"
+            args.alpha_threshold = self.alpha_edit_image_single.text()
+        elif mode == "image_threading":
+            args.image_file = self.image_threading_file_edit.text()
+            args.wipe = "on" if self.wipe_checkbox_image_threading.isChecked() else "off"
+            args.alpha_threshold = self.alpha_edit_image_threading.text()
+            args.encoder = "sextant" if self.sextant_checkbox_image_threading.isChecked() else "quadrant"
+            if self.bestfit_checkbox_image_threading.isChecked():
+                args.encoder += "-fit"
+            args.linear = self.linear_checkbox_image_threading.isChecked()
+        
+        input_file = args.ascii_file if mode.startswith("ascii") else args.image_file
+        if not input_file or not os.path.isfile(input_file):
+            return None
+        # Colors and numbers still being typed are not previewed
+        try:
+            if mode.startswith("ascii"):
+                parse_color(args.color)
+                parse_color(args.bg_color)
+            else:
+                args.alpha_threshold = int(args.alpha_threshold)
+        except ValueError:
+            return None
+        return args
+        
+    def start_preview(self):
+        # One render at a time; changes made meanwhile trigger one more render when it finishes
+        if self.preview_thread and self.preview_thread.isRunning():
+            self.preview_pending = True
+            return
+        self.preview_pending = False
+        
+        args = self.preview_args()
+        if args is None:
+            self.show_preview(QImage(), "")
+            return
+        self.preview_thread = PreviewThread(args, self.preview_label.size())
+        self.preview_thread.preview_ready.connect(self.show_preview)
+        self.preview_thread.finished.connect(self.preview_finished)
+        self.preview_thread.start()
+        
+    def preview_finished(self):
+        if self.preview_pending:
+            self.start_preview()
+            
+    def show_preview(self, image, info):
+        if image.isNull():
+            self.preview_label.setPixmap(QPixmap())
+            self.preview_label.setText("No preview")
+        else:
+            pixmap = QPixmap.fromImage(image).scaled(self.preview_label.size(), Qt.KeepAspectRatio, Qt.FastTransformation)
+            self.preview_label.setPixmap(pixmap)
+        self.preview_info.setText(info)
+        
     def clear_log(self):
-        with QMutexLocker(self.log_text._mutex):
-            self.log_text.clear()
+        self.log_text.clear()
         
+    # Safe from any thread
     def log_message(self, message):
-        self.log_text.safe_append(message)
+        self.log_text.post(message)
         
     def start_deployment(self):
         if self.deployment_thread and self.deployment_thread.isRunning():
@@ -1472,6 +1093,7 @@ class PixelArtGUI(QMainWindow):
             args.proxy_port = int(self.port_edit_ascii_single.text()) if self.port_edit_ascii_single and self.port_edit_ascii_single.text() else None
             args.color = self.color_edit_ascii_single.text() if self.color_edit_ascii_single else "#000000"
             args.bg_color = self.bg_color_edit_ascii_single.text() if self.bg_color_edit_ascii_single else None
+            args.markup = self.markup_checkbox_ascii_single.isChecked()
             
         elif mode == "ascii_threading":
             args.start_x = int(self.x_edit_ascii_threading.text())
@@ -1490,6 +1112,7 @@ class PixelArtGUI(QMainWindow):
             else:args.proxies = []
             args.color = self.color_edit_ascii_threading.text() if self.color_edit_ascii_threading else "#000000"
             args.bg_color = self.bg_color_edit_ascii_threading.text() if self.bg_color_edit_ascii_threading else None
+            args.markup = self.markup_checkbox_ascii_threading.isChecked()
                 
         elif mode == "image_single":
             args.start_x = int(self.x_edit_image_single.text())
@@ -1503,6 +1126,7 @@ class PixelArtGUI(QMainWindow):
             args.sleep_between = float(self.sleep_edit_image_single.text())
             args.wipe = "on" if self.wipe_checkbox_image_single.isChecked() else "off"
             args.image_file = self.image_file_edit.text() if self.image_file_edit else ""
+            args.alpha_threshold = int(self.alpha_edit_image_single.text())
             args.proxy_host = self.host_edit_image_single.text() or None
             args.proxy_port = int(self.port_edit_image_single.text()) if self.port_edit_image_single and self.port_edit_image_single.text() else None
             
@@ -1518,19 +1142,27 @@ class PixelArtGUI(QMainWindow):
             args.sleep_between = float(self.sleep_edit_image_threading.text())
             args.wipe = "on" if self.wipe_checkbox_image_threading.isChecked() else "off"
             args.image_file = self.image_threading_file_edit.text() if self.image_threading_file_edit else ""
+            args.alpha_threshold = int(self.alpha_edit_image_threading.text())
             args.proxy_file = self.proxy_file_edit_image_threading.text() if self.proxy_file_edit_image_threading else ""
             if args.proxy_file:args.proxies = parse_proxy_file(args.proxy_file)
             else:args.proxies = []
+            args.encoder = "sextant" if self.sextant_checkbox_image_threading.isChecked() else "quadrant"
+            if self.bestfit_checkbox_image_threading.isChecked():
+                args.encoder += "-fit"
+            args.linear = self.linear_checkbox_image_threading.isChecked()
         
         # Start deployment thread
         self.deployment_thread = DeploymentThread(args)
         self.deployment_thread.log_signal.connect(self.log_message)
+        self.deployment_thread.progress_signal.connect(self.deployment_progress)
         self.deployment_thread.finished_signal.connect(self.deployment_finished)
         
         self.deploy_btn.setEnabled(False)
         self.abort_btn.setEnabled(True)
         self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)  # Indeterminate progress
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("Converting %p%")
         
         self.deployment_thread.start()
         
@@ -1540,6 +1172,12 @@ class PixelArtGUI(QMainWindow):
             self.log_message("[INFO] Task aborted by user")
             self.deployment_finished(False)
             
+    def deployment_progress(self, percent):
+        if percent >= 100:
+            self.progress_bar.setRange(0, 0)  # Sending runs until the repeats are done or it is aborted
+        else:
+            self.progress_bar.setValue(percent)
+
     def deployment_finished(self, success):
         self.deploy_btn.setEnabled(True)
         self.abort_btn.setEnabled(False)
@@ -1608,6 +1246,7 @@ class PixelArtGUI(QMainWindow):
                     int(repeat_text)
                 int(self.chunk_edit_image_single.text())
                 float(self.sleep_edit_image_single.text())
+                int(self.alpha_edit_image_single.text())
             elif mode == "image_threading":
                 int(self.x_edit_image_threading.text())
                 int(self.y_edit_image_threading.text())
@@ -1616,13 +1255,28 @@ class PixelArtGUI(QMainWindow):
                     int(repeat_text)
                 int(self.chunk_edit_image_threading.text())
                 float(self.sleep_edit_image_threading.text())
+                int(self.alpha_edit_image_threading.text())
         except ValueError:
-            QMessageBox.critical(self, "Error", "Please check numeric fields (X, Y, Repeat, Chunk Size, Sleep)")
+            QMessageBox.critical(self, "Error", "Please check numeric fields (X, Y, Repeat, Chunk Size, Sleep, Alpha)")
             return False
+        
+        if mode in ["ascii_single", "ascii_threading"]:
+            try:
+                if mode == "ascii_single":
+                    parse_color(self.color_edit_ascii_single.text())
+                    parse_color(self.bg_color_edit_ascii_single.text())
+                else:
+                    parse_color(self.color_edit_ascii_threading.text())
+                    parse_color(self.bg_color_edit_ascii_threading.text())
+            except ValueError:
+                QMessageBox.critical(self, "Error", "Please enter colors as #rrggbb (Color, BG Color)")
+                return False
         return True
 
 # Main application
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    startup = time.perf_counter()
     app = QApplication(sys.argv)
     # Enable high DPI scaling
     app.setAttribute(Qt.AA_EnableHighDpiScaling, True)
@@ -1632,4 +1286,6 @@ if __name__ == "__main__":
     app.setFont(font)
     window = PixelArtGUI()
     window.show()
+    # Runs once the event loop has painted the first frame
+    QTimer.singleShot(0, lambda: window.log_message(f"[INFO] Started in {(time.perf_counter() - startup) * 1000:.0f} ms"))
     sys.exit(app.exec_())
@@ -0,0 +1,230 @@
+# In-process stand-in for the OWOT write endpoint: applies {"kind": "write", "edits": [...]} messages to an
+# in-memory tile model that can be read back as a CellGrid and drawn with the offline renderer. No network.
+import sys, json, argparse, threading, multiprocessing
+import numpy as np
+from core import (SQUARE_WIDTH, SQUARE_HEIGHT, NO_COLOR, CLUSTER_BASE, IMAGE_ENCODERS, CellGrid,
+                  build_grid, render_image, ascii_single_mode, ascii_threading_mode, image_single_mode, image_threading_mode)
+
+MODES = {
+    "ascii_single": ascii_single_mode,
+    "ascii_threading": ascii_threading_mode,
+    "image_single": image_single_mode,
+    "image_threading": image_threading_mode,
+}
+
+class MockTile:
+    """One SQUARE_HEIGHT x SQUARE_WIDTH tile: the character, colors and whether each cell was written."""
+    def __init__(self):
+        shape = (SQUARE_HEIGHT, SQUARE_WIDTH)
+        self.chars = np.full(shape, " ", dtype=object)
+        self.fg = np.zeros(shape, dtype=np.uint32)
+        self.bg = np.full(shape, NO_COLOR, dtype=np.uint32)
+        self.written = np.zeros(shape, dtype=bool)
+
+class MockWorld:
+    """Tiles keyed by (block_y, block_x), written the way OWOT applies write edits.
+
+    Edits are [block_y, block_x, part_y, part_x, timestamp, char, edit_id, fg(, bg)]; a missing bg
+    clears the cell's background. Malformed edits are counted in rejected instead of applied.
+    Thread-safe, since the threading modes send from one thread per proxy.
+    """
+    def __init__(self):
+        self.tiles = {}
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.applied = 0
+        self.rejected = 0
+        self.connections = []
+
+    # Drop-in for websocket.WebSocketApp (args.ws_app = world.ws_app)
+    def ws_app(self, url, on_open=None, on_error=None, on_close=None, on_message=None):
+        return MockWebSocketApp(self, url, on_open, on_error, on_close, on_message)
+
+    def receive(self, data):
+        message = json.loads(data)
+        if message.get("kind") != "write":
+            raise ValueError(f"Unsupported message kind: {message.get('kind')}")
+        accepted = []
+        with self.lock:
+            self.messages += 1
+            for edit in message.get("edits", []):
+                if self.apply(edit):
+                    accepted.append(edit[6])
+                else:
+                    self.rejected += 1
+            self.applied += len(accepted)
+        return {"kind": "write", "accepted": accepted, "rejected": {}}
+
+    def apply(self, edit):
+        if not isinstance(edit, list) or len(edit) not in (8, 9):
+            return False
+        block_y, block_x, part_y, part_x, _, char, _, fg = edit[:8]
+        if not (0 <= part_y < SQUARE_HEIGHT and 0 <= part_x < SQUARE_WIDTH) or not isinstance(char, str) or not char:
+            return False
+        tile = self.tiles.get((block_y, block_x))
+        if tile is None:
+            tile = self.tiles[(block_y, block_x)] = MockTile()
+        tile.chars[part_y, part_x] = char
+        tile.fg[part_y, part_x] = fg
+        tile.bg[part_y, part_x] = edit[8] if len(edit) == 9 else NO_COLOR
+        tile.written[part_y, part_x] = True
+        return True
+
+    # The cells [y:y+rows, x:x+cols] in character coordinates; cells never written are masked out
+    def grid(self, x, y, cols, rows):
+        chars = np.full((rows, cols), " ", dtype=object)
+        fg = np.zeros((rows, cols), dtype=np.uint32)
+        bg = np.full((rows, cols), NO_COLOR, dtype=np.uint32)
+        written = np.zeros((rows, cols), dtype=bool)
+        with self.lock:
+            for block_y in range(y // SQUARE_HEIGHT, (y + rows - 1) // SQUARE_HEIGHT + 1):
+                for block_x in range(x // SQUARE_WIDTH, (x + cols - 1) // SQUARE_WIDTH + 1):
+                    tile = self.tiles.get((block_y, block_x))
+                    if tile is None:
+                        continue
+                    # Overlap of this tile with the requested area, in tile and in grid coordinates
+                    top, left = block_y * SQUARE_HEIGHT, block_x * SQUARE_WIDTH
+                    y0, y1 = max(y, top), min(y + rows, top + SQUARE_HEIGHT)
+                    x0, x1 = max(x, left), min(x + cols, left + SQUARE_WIDTH)
+                    src = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+                    dst = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+                    chars[dst] = tile.chars[src]
+                    fg[dst] = tile.fg[src]
+                    bg[dst] = tile.bg[src]
+                    written[dst] = tile.written[src]
+        # Characters of more than one codepoint become clusters, as in layout_text
+        clusters = sorted({c for c in chars.ravel().tolist() if len(c) > 1})
+        cluster_ids = {c: CLUSTER_BASE + i for i, c in enumerate(clusters)}
+        codepoints = np.array([cluster_ids[c] if len(c) > 1 else ord(c) for c in chars.ravel().tolist()],
+                              dtype=np.uint32).reshape(rows, cols)
+        return CellGrid(codepoints, fg, bg, written, x, y, clusters or None)
+
+    # Bounding box (x, y, cols, rows) of all written cells, or None for an empty world
+    def bounds(self):
+        with self.lock:
+            if not self.tiles:
+                return None
+            ys, xs = [], []
+            for (block_y, block_x), tile in self.tiles.items():
+                rows, cols = np.nonzero(tile.written)
+                ys.extend((block_y * SQUARE_HEIGHT + rows).tolist())
+                xs.extend((block_x * SQUARE_WIDTH + cols).tolist())
+        if not xs:
+            return None
+        return min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1
+
+    def render(self, **kwargs):
+        bounds = self.bounds()
+        if bounds is None:
+            return None
+        return render_image(self.grid(*bounds), **kwargs)
+
+class MockWebSocketApp:
+    """Synchronous WebSocketApp look-alike: run_forever calls on_open, then on_close once closed."""
+    def __init__(self, world, url, on_open=None, on_error=None, on_close=None, on_message=None):
+        self.world = world
+        self.url = url
+        self.on_open = on_open
+        self.on_error = on_error
+        self.on_close = on_close
+        self.on_message = on_message
+        self.proxy = None
+        self.closed = False
+
+    def run_forever(self, **kwargs):
+        # Proxy settings are recorded, never used
+        self.proxy = (kwargs.get("http_proxy_host"), kwargs.get("http_proxy_port"))
+        with self.world.lock:
+            self.world.connections.append(self)
+        try:
+            if self.on_open:
+                self.on_open(self)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(self, e)
+        self.close()
+
+    def send(self, data):
+        if self.closed:
+            raise ConnectionError("Connection is already closed")
+        reply = self.world.receive(data)
+        if self.on_message:
+            self.on_message(self, json.dumps(reply))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.on_close:
+            self.on_close(self, None, None)
+
+# Cells where two grids of the same size differ (mask, character, fg or bg), compared only where written
+def grid_differences(expected, actual):
+    def texts(grid):
+        if not (expected.clusters or actual.clusters):
+            return grid.codepoints
+        lookup = np.vectorize(lambda c: grid.clusters[c - CLUSTER_BASE] if c >= CLUSTER_BASE else chr(c), otypes=[object])
+        return lookup(grid.codepoints)
+    expected_mask = expected.mask if expected.mask is not None else np.ones(expected.codepoints.shape, dtype=bool)
+    actual_mask = actual.mask if actual.mask is not None else np.ones(actual.codepoints.shape, dtype=bool)
+    differs = (texts(expected) != texts(actual)) | (expected.fg != actual.fg) | (expected.bg != actual.bg)
+    return int(((expected_mask != actual_mask) | (differs & expected_mask)).sum())
+
+# Run a mode against a fresh MockWorld; returns the world and the grid the mode should have written
+def run_mode(args):
+    world = MockWorld()
+    args.ws_app = world.ws_app
+    MODES[args.mode](args)
+    args.timer = None
+    expected = build_grid(args)
+    if expected is not None:
+        if args.wipe == "on":
+            expected = expected.wiped()
+        expected = expected.offset(args.start_x * SQUARE_WIDTH, args.start_y * SQUARE_HEIGHT)
+    return world, expected
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a mode against an in-memory OWOT world and check what it wrote")
+    parser.add_argument("input", help="ASCII text, image or .ddraw file")
+    parser.add_argument("--mode", choices=sorted(MODES), default="image_threading")
+    parser.add_argument("--start-x", type=int, default=0, help="tile x (OWOT coordinates)")
+    parser.add_argument("--start-y", type=int, default=0, help="tile y (OWOT coordinates)")
+    parser.add_argument("--connections", type=int, default=3, help="mock proxies for the threading modes")
+    parser.add_argument("--encoder", choices=sorted(IMAGE_ENCODERS), default="quadrant")
+    parser.add_argument("--color", default="")
+    parser.add_argument("--bg-color", default="")
+    parser.add_argument("--markup", action="store_true")
+    parser.add_argument("--wipe", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("-o", "--output", default=None, help="write the rendered world to this PNG")
+    args = parser.parse_args(argv)
+
+    args.ascii_file = args.image_file = args.input
+    args.wipe = "on" if args.wipe else "off"
+    args.repeat = 1
+    args.sleep_between = 0
+    args.server_url = "mock://owot"
+    args.proxy_host = args.proxy_port = None
+    args.proxies = [{"host": f"mock{i}", "port": 8080} for i in range(args.connections)]
+
+    world, expected = run_mode(args)
+    if expected is None:
+        return 1
+    print(f"[!] {world.messages} messages, {world.applied} edits applied, {world.rejected} rejected, "
+          f"{len(world.tiles)} tiles over {len(world.connections)} connections")
+    differences = grid_differences(expected, world.grid(expected.x, expected.y, expected.cols, expected.rows))
+    if args.output:
+        image = world.render()
+        if image is not None:
+            image.save(args.output)
+    if differences or world.rejected or world.applied != len(expected):
+        print(f"[X] {differences} of {expected.rows * expected.cols} cells differ from the converted grid, "
+              f"{world.applied} edits for {len(expected)} cells")
+        return 1
+    print(f"[!] World matches the converted {expected.cols}x{expected.rows} grid at ({expected.x}, {expected.y})")
+    return 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())